@@ -0,0 +1,389 @@
+"""
+Headless benchmarks for CreatureTime Tools.
+
+Generates synthetic heavy meshes and times every operator, the shape key
+sorting and each validation. Results are compared against a JSON baseline.
+
+Usage:
+    blender --background --factory-startup --python-exit-code 1 \
+        --python Benchmarks/run_benchmarks.py -- [options]
+
+Options:
+    --case NAME:VERTICES:SHAPE_KEYS:VERTEX_GROUPS   (repeatable, defaults to CASES)
+    --filter TEXT           Only run benchmarks whose id contains TEXT.
+    --repeat N              Number of timed runs per benchmark (minimum is kept).
+    --baseline PATH         Baseline JSON file (defaults to Benchmarks/baseline.json),
+                            comparing fails when it does not exist.
+    --write-baseline        Store the results as the new baseline.
+    --threshold RATIO       Allowed slowdown before a result is a regression.
+"""
+
+# Python imports
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+# Blender imports
+import bpy
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLENDER_PLUGINS_DIR = os.path.join(ROOT_DIR, 'Blender')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+if BLENDER_PLUGINS_DIR not in sys.path:
+    sys.path.insert(0, BLENDER_PLUGINS_DIR)
+
+# CreatureTime imports
+import creaturetime_tools
+from creaturetime_tools import validations
+from creaturetime_tools.operators import common
+
+# name: (vertices, shape keys, vertex groups)
+CASES = {
+    '10k': (10_000, 500, 300),
+    '100k': (100_000, 100, 100),
+    '1m': (1_000_000, 10, 10),
+}
+
+# Ignore regressions smaller than this, timer noise dominates below it.
+MIN_REGRESSION_SECONDS = 0.005
+
+VISEMES = (
+    'vrc.blink_left',
+    'vrc.blink_right',
+    'vrc.v_aa',
+    'vrc.v_oh',
+    'vrc.v_sil',
+)
+
+
+# -------------------------------------------------------------------
+#   Scene generation
+# -------------------------------------------------------------------
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    for armature in list(bpy.data.armatures):
+        bpy.data.armatures.remove(armature)
+
+
+def build_mesh(name, vertex_count, shape_key_count, vertex_group_count, seed=0):
+    """Builds a grid mesh with shape keys and vertex groups.
+
+    Every fifth shape key and every fourth vertex group is left unused, and
+    every seventh shape key is a scaled copy of the previous one, so the
+    remove and merge operators always have work to do.
+    """
+    rng = np.random.default_rng(seed)
+
+    side = max(2, int(math.ceil(math.sqrt(vertex_count))))
+    xs, ys = np.meshgrid(np.arange(side, dtype=np.float32), np.arange(side, dtype=np.float32))
+    co = np.column_stack((xs.ravel(), ys.ravel(), np.zeros(side * side, dtype=np.float32)))
+    co /= side
+
+    quads = np.arange(side * side).reshape(side, side)
+    faces = np.column_stack((quads[:-1, :-1].ravel(),
+                             quads[:-1, 1:].ravel(),
+                             quads[1:, 1:].ravel(),
+                             quads[1:, :-1].ravel()))
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set('co', co.ravel())
+    mesh.loops.add(faces.size)
+    mesh.loops.foreach_set('vertex_index', faces.ravel().astype(np.int32))
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set('loop_start', np.arange(0, faces.size, 4, dtype=np.int32))
+    mesh.update()
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+
+    vertices = len(co)
+    obj.shape_key_add(name='Basis', from_mix=False)
+    locs = co
+    for index in range(shape_key_count):
+        name = VISEMES[index] if index < len(VISEMES) else 'Key.%03d' % index
+        key = obj.shape_key_add(name=name, from_mix=False)
+        if index % 5 == 4:
+            continue
+
+        if index % 7 == 6:
+            locs = co + (locs - co) * 0.5
+        else:
+            # Offset a random region of roughly 5% of the vertices.
+            start = int(rng.integers(0, vertices))
+            affected = np.arange(start, start + max(1, vertices // 20)) % vertices
+            locs = co.copy()
+            locs[affected, 2] += rng.random(len(affected), dtype=np.float32) * 0.01 + 0.002
+        key.data.foreach_set('co', locs.ravel())
+
+    for index in range(vertex_group_count):
+        group = obj.vertex_groups.new(name='Bone.%03d' % index)
+        if index % 4 == 3:
+            continue
+
+        start = int(rng.integers(0, vertices))
+        affected = np.arange(start, start + max(1, vertices // 10)) % vertices
+        for weight, indices in zip((1.0, 0.5, 0.25), np.array_split(affected, 3)):
+            group.add(indices.tolist(), weight, 'REPLACE')
+
+    return obj
+
+
+def build_armature(name, bone_count):
+    """Builds a bone chain with a mix of valid and invalid bone names."""
+    armature = bpy.data.armatures.new(name)
+    obj = bpy.data.objects.new(name, armature)
+    bpy.context.scene.collection.objects.link(obj)
+
+    common.set_active(obj)
+    common.switch('EDIT')
+    parent = None
+    for index in range(bone_count):
+        if index % 3 == 0:
+            bone_name = 'mixamorig:LeftArm.%03d' % index
+        elif index % 3 == 1:
+            bone_name = 'Right Leg.%03d' % index
+        else:
+            bone_name = 'Spine.%03d' % index
+        bone = armature.edit_bones.new(bone_name)
+        bone.head = (0.0, 0.0, index * 0.1)
+        bone.tail = (0.0, 0.0, index * 0.1 + 0.1)
+        bone.parent = parent
+        parent = bone
+    common.switch('OBJECT')
+
+    return obj
+
+
+def duplicate(obj):
+    """Copies an object and its data so destructive benchmarks start fresh."""
+    copy = obj.copy()
+    copy.data = obj.data.copy()
+    bpy.context.scene.collection.objects.link(copy)
+    return copy
+
+
+def remove(obj):
+    data = obj.data
+    bpy.data.objects.remove(obj, do_unlink=True)
+    if data is not None and not data.users:
+        bpy.data.meshes.remove(data)
+
+
+# -------------------------------------------------------------------
+#   Benchmarks
+# -------------------------------------------------------------------
+
+class Benchmark(object):
+    """A timed callable.
+
+    `setup` receives the case template object and returns the state that
+    `run` consumes, `teardown` cleans it up again. Only `run` is timed.
+    """
+
+    def __init__(self, name, run, setup=duplicate, teardown=remove):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+
+
+def run_operator(op):
+    def run(obj):
+        common.set_active(obj)
+        with bpy.context.temp_override(object=obj, active_object=obj, selected_objects=[obj]):
+            op()
+    return run
+
+
+def remove_with_lods(obj):
+    prefix = obj.name + '_LOD'
+    for lod in [o for o in bpy.data.objects if o.name.startswith(prefix)]:
+        remove(lod)
+    remove(obj)
+
+
+def remove_from_edit_mode(obj):
+    common.switch('OBJECT')
+    remove(obj)
+
+
+def activate_last_shape_key(obj):
+    obj = duplicate(obj)
+    obj.active_shape_key_index = len(obj.data.shape_keys.key_blocks) - 1
+    return obj
+
+
+def add_mirror_modifier(obj):
+    obj = duplicate(obj)
+    obj.modifiers.new('Mirror', 'MIRROR')
+    return obj
+
+
+def export_sidecar(obj):
+    path = os.path.join(tempfile.gettempdir(), 'creaturetime_benchmark.ctsc')
+    run_operator(lambda: bpy.ops.creaturetime.export_sidecar(filepath=path))(obj)
+
+
+def keep_template(obj):
+    return obj
+
+
+def keep_scene(_):
+    pass
+
+
+def run_validation(validation):
+    def run(_):
+        validation.reset()
+        validation.validate(bpy.context, bpy.context.window_manager)
+    return run
+
+
+def collect_benchmarks():
+    benchmarks = [
+        Benchmark('shape_keys.remove_unused',
+                  run_operator(bpy.ops.creaturetime.remove_unused_blend_shapes)),
+        Benchmark('shape_keys.apply_as_basis',
+                  run_operator(bpy.ops.creaturetime.apply_shape_key_as_basis),
+                  setup=activate_last_shape_key),
+        Benchmark('shape_keys.select_affected_vertices',
+                  run_operator(bpy.ops.creaturetime.select_affected_shape_key_vertices),
+                  setup=activate_last_shape_key,
+                  teardown=remove_from_edit_mode),
+        Benchmark('vertex_groups.remove_unused',
+                  run_operator(bpy.ops.creaturetime.remove_unused_vertex_groups)),
+        Benchmark('shape_keys.sort',
+                  run_operator(bpy.ops.creaturetime.sort_shape_keys)),
+        Benchmark('common.sort_shape_keys', common.sort_shape_keys),
+        Benchmark('shape_keys.apply_modifiers',
+                  run_operator(bpy.ops.creaturetime.apply_modifiers_with_shape_keys),
+                  setup=add_mirror_modifier),
+        Benchmark('shape_keys.merge_duplicates',
+                  run_operator(bpy.ops.creaturetime.merge_duplicate_blend_shapes)),
+        Benchmark('lods.generate',
+                  run_operator(bpy.ops.creaturetime.generate_lods),
+                  teardown=remove_with_lods),
+        Benchmark('sidecar.export', export_sidecar,
+                  setup=keep_template, teardown=keep_scene),
+    ]
+
+    for validation in validations.validations:
+        name = 'validations.%s' % validation.__class__.__name__
+        benchmarks.append(Benchmark(name, run_validation(validation),
+                                    setup=keep_template, teardown=keep_scene))
+
+    return benchmarks
+
+
+# -------------------------------------------------------------------
+#   Runner
+# -------------------------------------------------------------------
+
+def time_benchmark(benchmark, template, repeat):
+    best = None
+    for _ in range(repeat):
+        state = benchmark.setup(template)
+        start = time.perf_counter()
+        benchmark.run(state)
+        elapsed = time.perf_counter() - start
+        benchmark.teardown(state)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_cases(cases, name_filter, repeat):
+    results = {}
+    benchmarks = collect_benchmarks()
+    for case_name, (vertices, shape_keys, vertex_groups) in cases.items():
+        clear_scene()
+        template = build_mesh('Bench_%s' % case_name, vertices, shape_keys, vertex_groups)
+        build_armature('Bench_%s_Armature' % case_name, vertex_groups)
+
+        for benchmark in benchmarks:
+            result_id = '%s/%s' % (case_name, benchmark.name)
+            if name_filter and name_filter not in result_id:
+                continue
+
+            common.switch('OBJECT')
+            results[result_id] = time_benchmark(benchmark, template, repeat)
+            print('%-60s %10.4fs' % (result_id, results[result_id]))
+
+    clear_scene()
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for result_id, seconds in sorted(results.items()):
+        previous = baseline.get(result_id)
+        if previous is None:
+            continue
+        if seconds > previous * (1.0 + threshold) and seconds - previous > MIN_REGRESSION_SECONDS:
+            regressions.append((result_id, previous, seconds))
+    return regressions
+
+
+def parse_case(value):
+    name, vertices, shape_keys, vertex_groups = value.split(':')
+    return name, (int(vertices), int(shape_keys), int(vertex_groups))
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(description='CreatureTime Tools benchmarks.')
+    parser.add_argument('--case', action='append', type=parse_case, default=[])
+    parser.add_argument('--filter', default='')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--write-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=None)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    cases = dict(args.case) if args.case else CASES
+
+    creaturetime_tools.register()
+    try:
+        results = run_cases(cases, args.filter, args.repeat)
+    finally:
+        creaturetime_tools.unregister()
+
+    baseline = {'threshold': 0.25, 'results': {}}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    elif not args.write_baseline:
+        print('No baseline at %s, run with --write-baseline to create one' % args.baseline)
+        return 1
+    threshold = args.threshold if args.threshold is not None else baseline['threshold']
+
+    if args.write_baseline:
+        baseline['blender'] = bpy.app.version_string
+        baseline['threshold'] = threshold
+        baseline['results'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print('Wrote baseline to %s' % args.baseline)
+        return 0
+
+    regressions = compare(results, baseline['results'], threshold)
+    for result_id, previous, seconds in regressions:
+        print('REGRESSION %s: %.4fs -> %.4fs' % (result_id, previous, seconds))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
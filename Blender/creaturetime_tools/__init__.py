@@ -1,14 +1,21 @@
-from . import resources
-from . import operators
-from . import validations
+# Submodules are imported on registration so that `creaturetime_tools.core`
+# can be imported outside of Blender, where bpy is not available.
 
 def register():
+    from . import resources
+    from . import operators
+    from . import validations
+
     resources.load_resources()
 
     operators.register()
     validations.register()
 
 def unregister():
+    from . import resources
+    from . import operators
+    from . import validations
+
     operators.unregister()
     validations.unregister()
 
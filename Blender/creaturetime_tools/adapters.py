@@ -0,0 +1,160 @@
+"""
+Bulk extraction and write-back between bpy data and `creaturetime_tools.core`.
+"""
+
+# Python imports
+import numpy as np
+
+# CreatureTime imports
+from .core import vertex_groups
+
+
+def get_coords(data, out=None):
+    """
+    Reads the `co` of every element of `data` into a flat float32 buffer.
+
+    `out` is reused when given, which avoids reallocating per shape key.
+    """
+    if out is None:
+        out = np.empty(3 * len(data), dtype=np.float32)
+    data.foreach_get('co', out)
+    return out
+
+
+def set_coords(data, co):
+    data.foreach_set('co', np.ascontiguousarray(co, dtype=np.float32).ravel())
+
+
+def get_array(data, attribute, dtype=np.float32, components=1, out=None):
+    """
+    Reads `attribute` of every element of `data` into a flat buffer.
+    """
+    size = components * len(data)
+    if out is None or len(out) != size or out.dtype != dtype:
+        out = np.empty(size, dtype=dtype)
+    data.foreach_get(attribute, out)
+    return out
+
+
+# Generic attribute data type: (property, dtype, components)
+_ATTRIBUTE_LAYOUTS = {
+    'FLOAT': ('value', np.float32, 1),
+    'INT': ('value', np.int32, 1),
+    'INT8': ('value', np.int32, 1),
+    'BOOLEAN': ('value', bool, 1),
+    'FLOAT2': ('vector', np.float32, 2),
+    'INT16_2D': ('value', np.int32, 2),
+    'INT32_2D': ('value', np.int32, 2),
+    'FLOAT_VECTOR': ('vector', np.float32, 3),
+    'FLOAT_COLOR': ('color', np.float32, 4),
+    'BYTE_COLOR': ('color', np.float32, 4),
+    'QUATERNION': ('value', np.float32, 4),
+    'FLOAT4X4': ('value', np.float32, 16),
+}
+
+
+def get_attribute(attribute):
+    """
+    Reads the values of a generic attribute into a flat buffer, None for unsupported data types.
+    """
+    layout = _ATTRIBUTE_LAYOUTS.get(attribute.data_type)
+    if layout is None:
+        return None
+    prop, dtype, components = layout
+    return get_array(attribute.data, prop, dtype, components)
+
+
+def get_weight_matrix(obj):
+    """
+    Reads all vertex group weights of a mesh object in a single pass over its vertices.
+    """
+    mesh = obj.data
+    vertices = []
+    groups = []
+    weights = []
+    for v in mesh.vertices:
+        for g in v.groups:
+            vertices.append(v.index)
+            groups.append(g.group)
+            weights.append(g.weight)
+
+    return vertex_groups.WeightMatrix(len(mesh.vertices), len(obj.vertex_groups),
+                                      vertices, groups, weights)
+
+
+def set_group_weights(group, vertices, weights):
+    """
+    Assigns weights to a vertex group with one call per distinct weight.
+    """
+    weights, inverse = np.unique(np.asarray(weights, dtype=np.float32), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    splits = np.cumsum(np.bincount(inverse, minlength=len(weights)))[:-1]
+    for weight, indices in zip(weights, np.split(np.asarray(vertices)[order], splits)):
+        group.add(indices.tolist(), float(weight), 'REPLACE')
+
+
+def set_weight_matrix(obj, matrix):
+    """
+    Writes the weights of a matrix onto the existing vertex groups of a mesh object.
+    """
+    order = np.argsort(matrix.groups, kind='stable')
+    splits = np.cumsum(np.bincount(matrix.groups, minlength=matrix.group_count))[:-1]
+    for group, entries in zip(obj.vertex_groups, np.split(order, splits)):
+        if len(entries):
+            set_group_weights(group, matrix.vertices[entries], matrix.weights[entries])
+
+
+def iter_key_deltas(obj, buffers, include_reference=False):
+    """
+    Yields (key block, locs, rel_locs) for the shape keys of a mesh object, reading one key at a time.
+
+    Relative key coordinates are read once, since many keys share the same
+    relative key. Keys relative to themselves are skipped, or yielded with
+    `rel_locs` of None when `include_reference` is set. The yielded arrays are
+    `buffers` that get reused, copy them to keep them.
+    """
+    shape_keys = obj.data.shape_keys
+    if not shape_keys:
+        return
+
+    cached = set()
+    for kb in shape_keys.key_blocks:
+        if kb == kb.relative_key:
+            if include_reference:
+                yield kb, buffers.coords('locs', kb.data), None
+            continue
+
+        locs = buffers.coords('locs', kb.data)
+
+        rel_name = kb.relative_key.name
+        if rel_name not in cached:
+            buffers.coords(('relative', rel_name), kb.relative_key.data)
+            cached.add(rel_name)
+        rel_locs = buffers.get(('relative', rel_name), len(locs))
+
+        yield kb, locs, rel_locs
+
+
+class Buffers(object):
+    """
+    Float32 buffers that are reused across objects and only grow when needed.
+    """
+
+    def __init__(self):
+        self.__buffers = {}
+
+    def get(self, key, size):
+        """
+        Returns a contiguous buffer of `size` floats for `key`.
+        """
+        buffer = self.__buffers.get(key)
+        if buffer is None or len(buffer) < size:
+            buffer = np.empty(size, dtype=np.float32)
+            self.__buffers[key] = buffer
+        return buffer[:size]
+
+    def coords(self, key, data):
+        """
+        Reads the `co` of every element of `data` into the buffer for `key`.
+        """
+        return get_coords(data, self.get(key, 3 * len(data)))
@@ -0,0 +1,15 @@
+"""
+Blender independent algorithms.
+
+Everything in here works on NumPy arrays and plain Python data only, so it
+can be unit-tested, profiled and reused outside of Blender. Use
+`creaturetime_tools.adapters` to move data between bpy and these functions.
+"""
+
+from . import bones
+from . import budget
+from . import meshes
+from . import names
+from . import shape_keys
+from . import sidecar
+from . import vertex_groups
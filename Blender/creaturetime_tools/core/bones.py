@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def parent_indices(names, parent_names):
+    """
+    Returns the index of each bone's parent, or -1 for root bones.
+    """
+    lookup = {name: index for index, name in enumerate(names)}
+    return np.array([lookup.get(parent, -1) if parent else -1 for parent in parent_names], dtype=np.int32)
+
+
+def child_counts(parents):
+    """
+    Returns the number of direct children of each bone.
+    """
+    parents = np.asarray(parents)
+    return np.bincount(parents[parents >= 0], minlength=len(parents))
+
+
+def nearest_kept_ancestors(parents, keep):
+    """
+    Returns the index of the nearest ancestor of each bone that is kept, or -1 if there is none.
+
+    Uses pointer jumping, so it only takes O(log depth) array passes.
+    """
+    parents = np.asarray(parents, dtype=np.int32)
+    keep = np.asarray(keep, dtype=bool)
+
+    ancestors = parents.copy()
+    while True:
+        pending = ancestors >= 0
+        pending[pending] = ~keep[ancestors[pending]]
+        if not pending.any():
+            return ancestors
+        ancestors[pending] = ancestors[ancestors[pending]]
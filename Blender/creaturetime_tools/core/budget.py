@@ -0,0 +1,82 @@
+import numpy as np
+
+# Bytes per affected vertex of a blend shape (three float32 offsets)
+BLENDSHAPE_VERTEX_BYTES = 12
+
+# (id, label), in the order they are reported
+METRICS = (
+    ('triangles', 'Triangles'),
+    ('vertices', 'Vertices'),
+    ('blendshape_bytes', 'Blend Shape Memory'),
+    ('bones', 'Skinned Bones'),
+    ('influences', 'Influences Per Vertex'),
+    ('materials', 'Material Slots'),
+)
+
+# Limits per performance rank. Triangles, bones and material slots follow the
+# VRChat PC avatar ranks, the other limits are studio defaults.
+RANKS = {
+    'EXCELLENT': {'triangles': 32000, 'vertices': 40000, 'blendshape_bytes': 4 << 20,
+                  'bones': 75, 'influences': 4, 'materials': 4},
+    'GOOD': {'triangles': 70000, 'vertices': 90000, 'blendshape_bytes': 8 << 20,
+             'bones': 150, 'influences': 4, 'materials': 8},
+    'MEDIUM': {'triangles': 70000, 'vertices': 90000, 'blendshape_bytes': 16 << 20,
+               'bones': 256, 'influences': 4, 'materials': 16},
+    'POOR': {'triangles': 70000, 'vertices': 90000, 'blendshape_bytes': 32 << 20,
+             'bones': 400, 'influences': 4, 'materials': 32},
+}
+
+# Metrics that are a maximum over vertices rather than a sum over objects
+PER_VERTEX_METRICS = ('influences',)
+
+
+def triangle_count(loop_totals):
+    """
+    Returns the number of triangles of polygons with the given corner counts.
+    """
+    return int(np.maximum(np.asarray(loop_totals, dtype=np.int64) - 2, 0).sum())
+
+
+def blendshape_bytes(affected_counts):
+    """
+    Returns the memory of blend shapes given the number of affected vertices of each one.
+    """
+    return int(np.sum(affected_counts, dtype=np.int64)) * BLENDSHAPE_VERTEX_BYTES
+
+
+def max_influences(matrix, skinned=None, threshold=0.0):
+    """
+    Returns the largest number of groups weighting a single vertex.
+
+    `skinned` is an optional boolean mask of the groups to count.
+    """
+    mask = matrix.weights > threshold
+    if skinned is not None:
+        mask &= np.asarray(skinned, dtype=bool)[matrix.groups]
+    vertices = matrix.vertices[mask]
+    if not len(vertices):
+        return 0
+    return int(np.bincount(vertices, minlength=matrix.vertex_count).max())
+
+
+def totals(costs):
+    """
+    Combines the per object costs into totals.
+    """
+    result = {}
+    for metric, _ in METRICS:
+        values = [cost[metric] for cost in costs] or [0]
+        result[metric] = max(values) if metric in PER_VERTEX_METRICS else sum(values)
+    return result
+
+
+def over_budget(totals, costs, limits):
+    """
+    Returns (metric, total, limit, index of the largest cost) for each metric over its limit.
+    """
+    exceeded = []
+    for metric, _ in METRICS:
+        if totals[metric] > limits[metric]:
+            largest = max(range(len(costs)), key=lambda index: costs[index][metric])
+            exceeded.append((metric, totals[metric], limits[metric], largest))
+    return exceeded
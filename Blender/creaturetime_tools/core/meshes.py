@@ -0,0 +1,50 @@
+import hashlib
+
+import numpy as np
+
+
+def fingerprint(arrays, names=()):
+    """
+    Returns a hash of the arrays and names.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in names:
+        digest.update(name.encode('utf-8'))
+        digest.update(b'\0')
+    for array in arrays:
+        array = np.asarray(array)
+        digest.update(str(array.shape).encode('ascii'))
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def group_duplicates(keys):
+    """
+    Returns lists of indices that share the same key, for keys appearing more than once.
+    """
+    groups = {}
+    for index, key in enumerate(keys):
+        groups.setdefault(key, []).append(index)
+    return [indices for indices in groups.values() if len(indices) > 1]
+
+
+def group_near_duplicates(arrays, precision):
+    """
+    Returns lists of indices whose arrays all differ by less than `precision`, for lists of more than one index.
+
+    `arrays` holds a sequence of arrays per item. Each item is compared against
+    the first item of every list found so far, hashing cannot do this because
+    nearly equal values can fall on either side of any grid.
+    """
+    groups = []
+    for index, values in enumerate(arrays):
+        for group in groups:
+            first = arrays[group[0]]
+            if len(first) == len(values) and all(
+                    np.shape(a) == np.shape(b) and np.allclose(a, b, rtol=0, atol=precision)
+                    for a, b in zip(first, values)):
+                group.append(index)
+                break
+        else:
+            groups.append([index])
+    return [group for group in groups if len(group) > 1]
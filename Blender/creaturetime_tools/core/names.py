@@ -0,0 +1,137 @@
+import re
+
+import numpy as np
+
+
+class Rule(object):
+    """
+    Text matching `pattern` is replaced by `replace`, and the name gets
+    `prefix` and `suffix` added once if any text matched.
+
+    A prefix ending in ':' is a namespace and goes in front of the name,
+    other prefixes go after the name's namespace.
+    """
+
+    def __init__(self, name, pattern, replace='', prefix='', suffix=''):
+        self.name = name
+        self.pattern = pattern
+        self.replace = replace
+        self.prefix = prefix
+        self.suffix = suffix
+
+
+class Convention(object):
+    """
+    A naming convention compiled from a table of rules into a single regex,
+    so a name is classified and rewritten in one pass.
+
+    Patterns are matched per line (`^` and `$` are name boundaries) and must
+    not match across a newline, which lets whole name lists be classified
+    with one scan.
+    """
+
+    def __init__(self, label, rules):
+        self.label = label
+        self.rules = {rule.name: rule for rule in rules}
+        self.__order = {rule.name: index for index, rule in enumerate(rules)}
+        self.__regex = re.compile('|'.join('(?P<%s>%s)' % (rule.name, rule.pattern) for rule in rules),
+                                  re.MULTILINE)
+
+    def needs_repair(self, name):
+        return self.__regex.search(name) is not None
+
+    def repair(self, name):
+        matched = set()
+
+        def replace(match):
+            matched.add(match.lastgroup)
+            return self.rules[match.lastgroup].replace
+
+        name = self.__regex.sub(replace, name)
+        rules = [self.rules[rule] for rule in sorted(matched, key=self.__order.get)]
+        namespaces = ''.join(rule.prefix for rule in rules if rule.prefix.endswith(':'))
+        prefixes = ''.join(rule.prefix for rule in rules if not rule.prefix.endswith(':'))
+        namespace, _, name = name.rpartition(':')
+        if namespace or _:
+            namespace += ':'
+        return namespaces + namespace + prefixes + name + ''.join(rule.suffix for rule in rules)
+
+    def classify(self, names):
+        """
+        Returns a boolean mask of the names that need repair, scanning all names at once.
+        """
+        names = list(names)
+        flagged = np.zeros(len(names), dtype=bool)
+        if not names:
+            return flagged
+
+        lengths = np.fromiter((len(name) + 1 for name in names), dtype=np.int64, count=len(names))
+        starts = np.cumsum(lengths) - lengths
+        positions = [match.start() for match in self.__regex.finditer('\n'.join(names))]
+        if positions:
+            flagged[np.searchsorted(starts, positions, side='right') - 1] = True
+        return flagged
+
+    def repair_all(self, names):
+        """
+        Returns the repaired names, only rewriting the names that need it.
+        """
+        names = list(names)
+        for index in np.flatnonzero(self.classify(names)):
+            names[index] = self.repair(names[index])
+        return names
+
+
+_NAMESPACE = r'^[^\n]*:'
+_SPACE = r' '
+# A side suffix needs text before it, so a bone named just 'Left' is left alone
+_LEFT_SUFFIX = r'(?<=[^\n:])(?:[._ ][Ll]|[._ ]?Left)$'
+_RIGHT_SUFFIX = r'(?<=[^\n:])(?:[._ ][Rr]|[._ ]?Right)$'
+
+CONVENTIONS = {
+    # Arm_L: no namespace, no spaces, sides as a suffix
+    'CREATURETIME': Convention('CreatureTime', [
+        Rule('namespace', _NAMESPACE),
+        Rule('left', r'Left', suffix='_L'),
+        Rule('right', r'Right', suffix='_R'),
+        Rule('space', _SPACE),
+    ]),
+    # LeftUpperArm: no namespace, no spaces, sides as a prefix
+    'UNITY': Convention('Unity Humanoid', [
+        Rule('namespace', _NAMESPACE),
+        Rule('left', _LEFT_SUFFIX, prefix='Left'),
+        Rule('right', _RIGHT_SUFFIX, prefix='Right'),
+        Rule('space', _SPACE),
+    ]),
+    # mixamorig:LeftArm: mixamorig namespace, no spaces, sides as a prefix
+    'MIXAMO': Convention('Mixamo', [
+        Rule('namespace', r'^(?!mixamorig:[^\n:]*$)[^\n]*:', prefix='mixamorig:'),
+        Rule('missing_namespace', r'^(?![^\n]*:)(?=[^\n])', prefix='mixamorig:'),
+        Rule('left', _LEFT_SUFFIX, prefix='Left'),
+        Rule('right', _RIGHT_SUFFIX, prefix='Right'),
+        Rule('space', _SPACE),
+    ]),
+}
+
+DEFAULT_CONVENTION = 'CREATURETIME'
+
+
+def needs_repair(name, convention=DEFAULT_CONVENTION):
+    """
+    Returns True if the bone name does not follow the naming convention.
+    """
+    return CONVENTIONS[convention].needs_repair(name)
+
+
+def repair_name(name, convention=DEFAULT_CONVENTION):
+    """
+    Returns the bone name rewritten to follow the naming convention.
+    """
+    return CONVENTIONS[convention].repair(name)
+
+
+def classify(names, convention=DEFAULT_CONVENTION):
+    """
+    Returns a boolean mask of the bone names that do not follow the naming convention.
+    """
+    return CONVENTIONS[convention].classify(names)
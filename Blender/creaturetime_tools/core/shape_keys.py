@@ -0,0 +1,203 @@
+import numpy as np
+
+# Order used by VRChat for visemes and eye tracking.
+DEFAULT_ORDER = (
+    'Basis',
+    'vrc.blink_left',
+    'vrc.blink_right',
+    'vrc.lowerlid_left',
+    'vrc.lowerlid_right',
+    'vrc.v_aa',
+    'vrc.v_ch',
+    'vrc.v_dd',
+    'vrc.v_e',
+    'vrc.v_ff',
+    'vrc.v_ih',
+    'vrc.v_kk',
+    'vrc.v_nn',
+    'vrc.v_oh',
+    'vrc.v_ou',
+    'vrc.v_pp',
+    'vrc.v_rr',
+    'vrc.v_sil',
+    'vrc.v_ss',
+    'vrc.v_th',
+    'Basis Original'
+)
+
+
+def shape_key_order(shape_key_order=None):
+    """
+    Returns the preferred order of shape key names, followed by any extra names.
+    """
+    order = list(DEFAULT_ORDER)
+    for shape in shape_key_order or ():
+        if shape not in order:
+            order.append(shape)
+    return order
+
+
+def is_unused(locs, rel_locs, tolerance):
+    """
+    Returns True if no coordinate of `locs` differs from `rel_locs` by `tolerance` or more.
+
+    Both arrays are flat (3 * vertices) coordinate buffers.
+    """
+    return bool((np.abs(locs - rel_locs) < tolerance).all())
+
+
+def affected_vertices(locs, rel_locs, tolerance):
+    """
+    Returns a boolean mask of the vertices that moved further than `tolerance`.
+    """
+    deltas = (locs - rel_locs).reshape(-1, 3)
+    return np.einsum('ij,ij->i', deltas, deltas) > tolerance * tolerance
+
+
+def sort_moves(names, order, reference='Basis', relative=True):
+    """
+    Returns the shape key names to move to the top, one after another, so that
+    `reference` becomes the first key followed by the keys named in `order`.
+
+    Mirrors Blender's `object.shape_key_move(type='TOP')`, which moves relative
+    keys below the reference key unless they are already second. Each key is
+    moved at most once, so sorting needs O(keys) moves.
+    """
+    names = list(names)
+    moves = []
+
+    def move(name):
+        index = names.index(name)
+        new_index = 0 if index <= 1 or not relative else 1
+        names.insert(new_index, names.pop(index))
+        moves.append(name)
+
+    if relative and reference in names:
+        while names[0] != reference:
+            move(reference)
+
+    present = set(names)
+    targets = [name for name in order if name in present and (name != names[0] or not relative)]
+    for name in reversed(targets):
+        index = names.index(name)
+        if index == 0 or (relative and index == 1):
+            continue
+        move(name)
+
+    return moves
+
+
+def remap_keys(coords, basis, vertex_map, target_basis):
+    """
+    Transfers shape keys onto another mesh in one vectorized operation.
+
+    `coords` holds the flat coordinates of every key (keys, 3 * vertices),
+    `vertex_map` gives the source vertex of each target vertex. Returns the
+    target key coordinates, `target_basis` offset by the mapped deltas.
+    """
+    keys = len(coords)
+    deltas = (np.asarray(coords).reshape(keys, -1, 3) - np.asarray(basis).reshape(1, -1, 3))[:, vertex_map]
+    return (deltas + np.asarray(target_basis).reshape(1, -1, 3)).reshape(keys, -1)
+
+
+class DuplicateFinder(object):
+    """
+    Groups shape keys whose deltas from their relative key are equal up to a
+    positive scale factor.
+
+    Keys sharing `names` are compared all at once: their sparse deltas are
+    multiplied into one matrix of dot products, which gives the scale factor
+    and least squares distance of every pair and rules out the pairs whose
+    offsets cannot all stay within `tolerance`. The remaining pairs are
+    checked offset by offset, nearest first. No vertex is singled out, so
+    keys moving many vertices by the same amount are found too.
+    """
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.__groups = {}
+
+    def add(self, name, locs, rel_locs, names=()):
+        """
+        Adds a key, `names` (e.g. its relative key and vertex group) must also match for keys to be duplicates.
+        """
+        deltas = (locs - rel_locs).reshape(-1, 3).astype(np.float64)
+        lengths = np.einsum('ij,ij->i', deltas, deltas)
+        if not len(lengths) or lengths.max() < self.tolerance * self.tolerance:
+            return
+
+        # Offsets far below the tolerance are dropped to keep the keys sparse
+        indices = np.flatnonzero(lengths > (0.01 * self.tolerance) ** 2)
+        self.__groups.setdefault(tuple(names), []).append((name, indices, deltas[indices].astype(np.float32)))
+
+    def clusters(self):
+        """
+        Returns (kept name, [(duplicate name, scale)]) for every cluster of duplicates.
+
+        The key with the largest delta is kept, so every duplicate equals the
+        kept key at `scale` <= 1 times its value (up to rounding).
+        """
+        result = []
+        for keys in self.__groups.values():
+            for cluster in self.__cluster(keys):
+                if len(cluster) < 2:
+                    continue
+                # Rounding keeps the first of several exact copies
+                kept, kept_scale = max(cluster, key=lambda entry: round(entry[1], 6))
+                result.append((kept, [(name, float(scale / kept_scale)) for name, scale in cluster if name != kept]))
+        return result
+
+    def __cluster(self, keys):
+        """
+        Returns the clusters of `keys` as lists of (name, scale relative to the first key).
+        """
+        products = _dot_products([(indices, deltas) for _, indices, deltas in keys])
+        norms = np.diag(products)
+        sizes = np.array([len(indices) for _, indices, _ in keys])
+
+        # Offsets within `tolerance` on every vertex moved by either key bound the least squares distance
+        distances = norms[:, None] - products * products / norms[None, :]
+        candidates = (products > 0) & (distances < 3 * (sizes[:, None] + sizes[None, :]) * self.tolerance ** 2)
+
+        references = []
+        clusters = []
+        for key, (name, indices, deltas) in enumerate(keys):
+            matches = [cluster for cluster, reference in enumerate(references) if candidates[key, reference]]
+            for cluster in sorted(matches, key=lambda cluster: distances[key, references[cluster]]):
+                reference = references[cluster]
+                scale = products[key, reference] / norms[reference]
+                _, reference_indices, reference_deltas = keys[reference]
+
+                support = np.union1d(indices, reference_indices)
+                residual = np.zeros((len(support), 3))
+                residual[np.searchsorted(support, indices)] = deltas
+                residual[np.searchsorted(support, reference_indices)] -= scale * reference_deltas
+                if np.abs(residual).max() < self.tolerance:
+                    clusters[cluster].append((name, scale))
+                    break
+            else:
+                references.append(key)
+                clusters.append([(name, 1.0)])
+        return clusters
+
+
+def _dot_products(keys, block_size=2 ** 22):
+    """
+    Returns the matrix of dot products of sparse (indices, deltas) keys.
+
+    The keys are expanded over the vertices moved by any of them, `block_size`
+    offsets at a time, so the dense blocks stay small.
+    """
+    support = np.unique(np.concatenate([indices for indices, _ in keys]))
+    positions = [np.searchsorted(support, indices) for indices, _ in keys]
+    step = max(1, block_size // (3 * len(keys)))
+
+    products = np.zeros((len(keys), len(keys)))
+    for start in range(0, len(support), step):
+        block = np.zeros((len(keys), min(step, len(support) - start), 3))
+        for row, ((_, deltas), position) in enumerate(zip(keys, positions)):
+            first, last = np.searchsorted(position, (start, start + step))
+            block[row, position[first:last] - start] = deltas[first:last]
+        block = block.reshape(len(keys), -1)
+        products += block @ block.T
+    return products
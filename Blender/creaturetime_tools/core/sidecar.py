@@ -0,0 +1,156 @@
+"""
+Binary sidecar files holding shape key deltas and vertex weights.
+
+Layout (little endian):
+    header      32 bytes: magic, version (uint32), reserved (uint32),
+                          table of contents offset (uint64) and size (uint64)
+    arrays      raw C-ordered arrays, each starting on a 64 byte boundary
+    contents    UTF-8 JSON describing the arrays, shape keys and vertex groups
+
+Every array entry in the contents has an `offset`, `dtype` and `shape`, so
+external tools can `np.memmap` the arrays without parsing anything else.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'CTSIDECR'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIQQ')
+_ALIGNMENT = 64
+
+
+class Writer(object):
+    """
+    Streams arrays into a sidecar file, the contents are written on close.
+    """
+
+    def __init__(self, path):
+        self.__file = open(path, 'wb')
+        self.__file.write(b'\0' * _HEADER.size)
+        self.arrays = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__file.close()
+
+    def add_array(self, name, array):
+        array = np.ascontiguousarray(array)
+        offset = self.__file.tell()
+        padding = -offset % _ALIGNMENT
+        self.__file.write(b'\0' * padding)
+        offset += padding
+
+        self.__file.write(array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
+        self.arrays[name] = {'offset': offset, 'dtype': array.dtype.newbyteorder('<').str, 'shape': list(array.shape)}
+        return name
+
+    def close(self, contents):
+        contents = dict(contents, version=VERSION, arrays=self.arrays)
+        data = json.dumps(contents, sort_keys=True).encode('utf-8')
+        offset = self.__file.tell()
+        self.__file.write(data)
+
+        self.__file.seek(0)
+        self.__file.write(_HEADER.pack(MAGIC, VERSION, 0, offset, len(data)))
+        self.__file.close()
+
+
+class Sidecar(object):
+    """
+    A sidecar file opened for reading, arrays are memory-mapped on access.
+    """
+
+    def __init__(self, path, contents):
+        self.path = path
+        self.contents = contents
+
+    def array(self, name):
+        info = self.contents['arrays'][name]
+        shape = tuple(info['shape'])
+        if not np.prod(shape, dtype=np.int64):
+            return np.empty(shape, dtype=info['dtype'])
+        return np.memmap(self.path, dtype=info['dtype'], mode='r', offset=info['offset'], shape=shape)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        magic, version, _, offset, size = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError('%s is not a sidecar file' % path)
+        if version > VERSION:
+            raise ValueError('%s has unsupported sidecar version %d' % (path, version))
+        f.seek(offset)
+        contents = json.loads(f.read(size).decode('utf-8'))
+    return Sidecar(path, contents)
+
+
+def sparse_delta(locs, rel_locs, dtype=np.float32):
+    """
+    Returns the indices of the moved vertices and their offsets from the relative key.
+    """
+    deltas = (locs - rel_locs).reshape(-1, 3)
+    indices = np.flatnonzero(deltas.any(axis=1)).astype(np.uint32)
+    return indices, deltas[indices].astype(dtype)
+
+
+def write(path, basis, shape_keys, weights=None, group_names=(), dtype=np.float32, **contents):
+    """
+    Writes a sidecar file.
+
+    `shape_keys` is an iterable of (name, relative name, indices, deltas) and
+    is consumed one key at a time, so keys can be streamed from Blender. A
+    relative name of None means the deltas are relative to `basis`.
+    """
+    basis = np.asarray(basis, dtype=np.float32).reshape(-1, 3)
+    with Writer(path) as writer:
+        writer.add_array('basis', basis)
+
+        keys = []
+        for index, (name, relative, indices, deltas) in enumerate(shape_keys):
+            keys.append({
+                'name': name,
+                'relative': relative,
+                'indices': writer.add_array('shape_keys/%d/indices' % index, np.asarray(indices, dtype=np.uint32)),
+                'deltas': writer.add_array('shape_keys/%d/deltas' % index, np.asarray(deltas, dtype=dtype)),
+            })
+
+        if weights is not None:
+            order = np.lexsort((weights.groups, weights.vertices))
+            writer.add_array('weights/vertices', weights.vertices[order].astype(np.uint32))
+            writer.add_array('weights/groups', weights.groups[order].astype(np.uint32))
+            writer.add_array('weights/weights', weights.weights[order].astype(np.float32))
+
+        writer.close(dict(contents,
+                          vertex_count=len(basis),
+                          shape_keys=keys,
+                          vertex_groups=list(group_names)))
+
+
+def shape_key_coords(sidecar):
+    """
+    Returns the absolute coordinates of every shape key, keyed by name, resolving relative keys.
+    """
+    basis = np.asarray(sidecar.array('basis'), dtype=np.float32)
+    keys = {key['name']: key for key in sidecar.contents['shape_keys']}
+    coords = {}
+
+    def resolve(name):
+        if name in coords:
+            return coords[name]
+        key = keys[name]
+        coords[name] = basis  # Guards against relative key cycles
+        relative = basis if key['relative'] not in keys else resolve(key['relative'])
+        locs = relative.copy()
+        locs[np.asarray(sidecar.array(key['indices']), dtype=np.int64)] += sidecar.array(key['deltas'])
+        coords[name] = locs
+        return locs
+
+    for name in keys:
+        resolve(name)
+    return coords
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class WeightMatrix(object):
+    """
+    Sparse vertex weight matrix in coordinate format.
+
+    Entry `i` assigns `weights[i]` of group `groups[i]` to vertex `vertices[i]`.
+    """
+
+    def __init__(self, vertex_count, group_count, vertices, groups, weights):
+        self.vertex_count = vertex_count
+        self.group_count = group_count
+        self.vertices = np.asarray(vertices, dtype=np.int32)
+        self.groups = np.asarray(groups, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def used_groups(self, threshold=0.0):
+        """
+        Returns a boolean mask of the groups with at least one weight above `threshold`.
+        """
+        used = np.zeros(self.group_count, dtype=bool)
+        used[self.groups[self.weights > threshold]] = True
+        return used
+
+    def take(self, vertex_map):
+        """
+        Returns a matrix for new vertices, where vertex `i` copies the weights of vertex `vertex_map[i]`.
+        """
+        vertex_map = np.asarray(vertex_map, dtype=np.int64)
+        order = np.argsort(self.vertices, kind='stable')
+        counts = np.bincount(self.vertices, minlength=self.vertex_count)
+        starts = np.cumsum(counts) - counts
+
+        lengths = counts[vertex_map]
+        total = int(lengths.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        entries = order[np.repeat(starts[vertex_map], lengths) + offsets]
+
+        return WeightMatrix(len(vertex_map), self.group_count,
+                            np.repeat(np.arange(len(vertex_map)), lengths),
+                            self.groups[entries], self.weights[entries])
+
+    def dense(self):
+        """
+        Returns the matrix as a dense (vertices, groups) array.
+        """
+        matrix = np.zeros((self.vertex_count, self.group_count), dtype=np.float32)
+        matrix[self.vertices, self.groups] = self.weights
+        return matrix
+
+
+def merge_groups(matrix, targets):
+    """
+    Adds the weights of every group into group `targets[group]`, -1 drops the group's weights.
+
+    Weights landing on the same vertex and group are summed and clamped to 1.
+    Returns the merged matrix and a mask of its entries that received weights
+    from another group, which are the only ones that need writing back.
+    """
+    targets = np.asarray(targets, dtype=np.int64)
+    group_count = max(matrix.group_count, int(targets.max()) + 1 if len(targets) else 0)
+
+    groups = targets[matrix.groups]
+    keep = groups >= 0
+    moved = (groups != matrix.groups)[keep]
+    keys = matrix.vertices[keep].astype(np.int64) * group_count + groups[keep]
+
+    keys, inverse = np.unique(keys, return_inverse=True)
+    weights = np.bincount(inverse, weights=matrix.weights[keep], minlength=len(keys))
+    changed = np.bincount(inverse, weights=moved, minlength=len(keys)) > 0
+
+    merged = WeightMatrix(matrix.vertex_count, group_count,
+                          keys // group_count, keys % group_count, np.minimum(weights, 1.0))
+    return merged, changed
@@ -1,11 +1,20 @@
 
 from . import vertex_groups
 from . import shape_keys
+from . import lods
+from . import bones
+from . import sidecar
 
 def register():
     vertex_groups.register()
     shape_keys.register()
+    lods.register()
+    bones.register()
+    sidecar.register()
 
 def unregister():
     vertex_groups.unregister()
     shape_keys.unregister()
+    lods.unregister()
+    bones.unregister()
+    sidecar.unregister()
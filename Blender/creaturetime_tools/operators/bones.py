@@ -0,0 +1,201 @@
+
+# Python imports
+import fnmatch
+
+# Blender imports
+import bpy
+import numpy as np
+
+from bpy.props import (BoolProperty,
+                       EnumProperty,
+                       FloatProperty,
+                       StringProperty)
+
+# CreatureTime imports
+from . import common
+from .. import adapters
+from .. import resources
+from ..core import bones as core_bones
+from ..core import names
+from ..core import vertex_groups as core_vertex_groups
+
+
+def get_armature(obj):
+    """
+    Returns the armature object of an armature, or of a mesh deformed by one.
+    """
+    if obj is None:
+        return None
+    if obj.type == 'ARMATURE':
+        return obj
+    for modifier in obj.modifiers:
+        if modifier.type == 'ARMATURE' and modifier.object:
+            return modifier.object
+    return None
+
+
+def get_skinned_meshes(armature):
+    """
+    Returns the mesh objects deformed by an armature.
+    """
+    return [obj for obj in bpy.data.objects
+            if obj.type == 'MESH' and any(modifier.type == 'ARMATURE' and modifier.object == armature
+                                          for modifier in obj.modifiers)]
+
+
+class _MergeBoneWeights(bpy.types.Operator):
+    """
+    Removes bones and adds their vertex weights into the nearest kept parent bone.
+    """
+
+    bl_label = "Merge Bone Weights Into Parents"
+    bl_idname = "creaturetime.merge_bone_weights"
+    bl_description = "Removes bones and adds their vertex weights into the nearest kept parent bone."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name='Bones',
+        items=[('PATTERN', 'Name Pattern', 'Bones matching any of the comma separated name patterns'),
+               ('NAMING', 'Naming Convention', 'Bones that break the bone naming convention'),
+               ('LEAF', 'Small Leaf Bones', 'Bones without children and with little influence')],
+        default='PATTERN')
+    pattern: StringProperty(name='Pattern', default='*Twist*')
+    min_influence: FloatProperty(name='Minimum Influence',
+                                 description='Leaf bones with a smaller summed weight are removed',
+                                 min=0.0, default=1.0)
+    drop_unparented: BoolProperty(name='Drop Unparented Weights',
+                                  description='Remove bones without a kept parent bone along with their weights',
+                                  default=False)
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and get_armature(context.object) is not None
+
+    def bones_to_remove(self, bone_names, parents, influence):
+        if self.mode == 'PATTERN':
+            patterns = [pattern.strip() for pattern in self.pattern.split(',') if pattern.strip()]
+            return np.array([any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+                             for name in bone_names], dtype=bool)
+        if self.mode == 'NAMING':
+            convention = bpy.context.window_manager.validator_settings.bone_naming_convention
+            return names.classify(bone_names, convention)
+        return (core_bones.child_counts(parents) == 0) & (influence < self.min_influence)
+
+    def execute(self, context):
+        armature = get_armature(context.object)
+        bones = armature.data.bones
+        bone_names = [bone.name for bone in bones]
+        bone_indices = {name: index for index, name in enumerate(bone_names)}
+        parents = core_bones.parent_indices(bone_names, [bone.parent.name if bone.parent else None for bone in bones])
+
+        # Read every skinned mesh's weights once
+        meshes = get_skinned_meshes(armature)
+        matrices = []
+        mesh_group_bones = []
+        influence = np.zeros(len(bones), dtype=np.float64)
+        for obj in meshes:
+            obj.update_from_editmode()
+            matrix = adapters.get_weight_matrix(obj)
+            matrices.append(matrix)
+
+            group_bones = np.array([bone_indices.get(group.name, -1) for group in obj.vertex_groups], dtype=np.int64)
+            mesh_group_bones.append(group_bones)
+            sums = np.bincount(matrix.groups, weights=matrix.weights, minlength=len(group_bones))
+            is_bone = group_bones >= 0
+            np.add.at(influence, group_bones[is_bone], sums[is_bone])
+
+        remove = self.bones_to_remove(bone_names, parents, influence)
+        if not remove.any():
+            self.report({'INFO'}, 'No bones to remove')
+            return {'CANCELLED'}
+        ancestors = core_bones.nearest_kept_ancestors(parents, ~remove)
+
+        # Weights of removed bones without a kept ancestor have no bone to go to
+        unparented = remove & (ancestors < 0)
+        dropped_groups = 0
+        dropped_weights = 0
+        for matrix, group_bones in zip(matrices, mesh_group_bones):
+            dropped = np.zeros(len(group_bones), dtype=bool)
+            is_bone = group_bones >= 0
+            dropped[is_bone] = unparented[group_bones[is_bone]]
+            dropped_groups += int(dropped.sum())
+            dropped_weights += int(np.count_nonzero(dropped[matrix.groups] & (matrix.weights > 0)))
+
+        if dropped_weights and not self.drop_unparented:
+            self.report({'ERROR'}, '%s: %d vertex groups of bones without a kept parent hold %d weights, '
+                                   'enable Drop Unparented Weights to remove them' % (
+                                       armature.name, dropped_groups, dropped_weights))
+            return {'CANCELLED'}
+
+        for obj, matrix in zip(meshes, matrices):
+            self.merge_weights(obj, matrix, bone_indices, bone_names, remove, ancestors)
+
+        # Children of removed bones are reparented to the removed bone's parent
+        active = common.get_active()
+        common.set_active(armature)
+        common.switch('EDIT')
+        edit_bones = armature.data.edit_bones
+        for name in np.array(bone_names, dtype=object)[remove]:
+            edit_bones.remove(edit_bones[name])
+        common.switch('OBJECT')
+        if active:
+            common.set_active(active)
+
+        if dropped_groups:
+            self.report({'WARNING'}, '%s: dropped %d weights of %d vertex groups without a kept parent bone' % (
+                armature.name, dropped_weights, dropped_groups))
+        self.report({'INFO'}, '%s: removed %d bones from %d meshes' % (armature.name, remove.sum(), len(meshes)))
+        return {'FINISHED'}
+
+    @staticmethod
+    def merge_weights(obj, matrix, bone_indices, bone_names, remove, ancestors):
+        vertex_groups = obj.vertex_groups
+        targets = np.arange(len(vertex_groups), dtype=np.int64)
+        removed_groups = []
+
+        for index, group in enumerate(list(vertex_groups)):
+            bone = bone_indices.get(group.name, -1)
+            if bone < 0 or not remove[bone]:
+                continue
+
+            removed_groups.append(group)
+            ancestor = ancestors[bone]
+            if ancestor < 0:
+                targets[index] = -1
+                continue
+
+            ancestor_name = bone_names[ancestor]
+            if ancestor_name not in vertex_groups:
+                vertex_groups.new(name=ancestor_name)
+            targets[index] = vertex_groups[ancestor_name].index
+
+        merged, changed = core_vertex_groups.merge_groups(matrix, targets)
+
+        # Only write the weights that received weights of removed groups
+        groups = merged.groups[changed]
+        vertices = merged.vertices[changed]
+        weights = merged.weights[changed]
+        for group_index in np.unique(groups):
+            mask = groups == group_index
+            adapters.set_group_weights(vertex_groups[int(group_index)], vertices[mask], weights[mask])
+
+        for group in removed_groups:
+            vertex_groups.remove(group)
+
+
+def apply_operators(self, _):
+    layout = self.layout
+    layout.operator(_MergeBoneWeights.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
+    layout.separator()
+
+
+def register():
+    bpy.utils.register_class(_MergeBoneWeights)
+
+    bpy.types.MESH_MT_vertex_group_context_menu.append(apply_operators)
+
+
+def unregister():
+    bpy.types.MESH_MT_vertex_group_context_menu.remove(apply_operators)
+
+    bpy.utils.unregister_class(_MergeBoneWeights)
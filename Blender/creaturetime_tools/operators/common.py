@@ -1,6 +1,13 @@
 
 import bpy
 
+from . import modal
+from ..core import shape_keys as core_shape_keys
+
+# Shape key settings copied onto rebuilt shape keys. Slider limits come first,
+# since `value` is clamped to the slider range of the key when it is set.
+SHAPE_KEY_SETTINGS = ('slider_max', 'slider_min', 'value', 'vertex_group', 'interpolation', 'mute')
+
 def hide(obj, val=True):
     obj.hide_set(val)
 
@@ -17,6 +24,29 @@ def set_active(obj, skip_sel=False):
         select(obj)
     bpy.context.view_layer.objects.active = obj
 
+def get_meshes(context, predicate=None):
+    """
+    Returns the selected mesh objects, or the active object if nothing is selected.
+    """
+    objs = [obj for obj in context.selected_objects if obj.type == 'MESH']
+    if not objs and context.object and context.object.type == 'MESH':
+        objs = [context.object]
+    if predicate:
+        objs = [obj for obj in objs if predicate(obj)]
+    return objs
+
+def switch_all(objs, new_mode):
+    """
+    Switches all objects into a mode at once, using multi-object editing.
+    """
+    if not objs:
+        return
+    if get_active() not in objs:
+        set_active(objs[0])
+    for obj in objs:
+        select(obj)
+    switch(new_mode)
+
 def switch(new_mode, check_mode=True):
     if check_mode and get_active() and get_active().mode == new_mode:
         return
@@ -29,88 +59,51 @@ def has_shape_keys(mesh):
         return False
     return hasattr(mesh.data.shape_keys, 'key_blocks')
 
+def move_shape_key_to_top(mesh, name):
+    mesh.active_shape_key_index = mesh.data.shape_keys.key_blocks.find(name)
+    with bpy.context.temp_override(object=mesh, active_object=mesh):
+        bpy.ops.object.shape_key_move(type='TOP')
+
+class SortShapeKeysJob(modal.Job):
+    """
+    Moves shape keys into order, one key per step.
+    """
+
+    def __init__(self, mesh, order, reference='Basis'):
+        self.mesh = mesh
+        shape_keys = mesh.data.shape_keys
+        self.__original = [kb.name for kb in shape_keys.key_blocks]
+        self.__moves = core_shape_keys.sort_moves(self.__original, order, reference, shape_keys.use_relative)
+        self.__done = 0
+        self.total = len(self.__moves)
+
+    def steps(self):
+        for name in self.__moves:
+            move_shape_key_to_top(self.mesh, name)
+            self.__done += 1
+            yield self.__done
+
+        self.mesh.active_shape_key_index = 0
+
+    def rollback(self):
+        if not self.__done:
+            return
+        shape_keys = self.mesh.data.shape_keys
+        names = [kb.name for kb in shape_keys.key_blocks]
+        for name in core_shape_keys.sort_moves(names, self.__original[1:], self.__original[0], shape_keys.use_relative):
+            move_shape_key_to_top(self.mesh, name)
+        self.mesh.active_shape_key_index = 0
+        self.__done = 0
+
 def sort_shape_keys(mesh, shape_key_order=None):
     if not has_shape_keys(mesh):
         return
     set_active(mesh)
 
-    if not shape_key_order:
-        shape_key_order = []
-
-    order = [
-        'Basis',
-        'vrc.blink_left',
-        'vrc.blink_right',
-        'vrc.lowerlid_left',
-        'vrc.lowerlid_right',
-        'vrc.v_aa',
-        'vrc.v_ch',
-        'vrc.v_dd',
-        'vrc.v_e',
-        'vrc.v_ff',
-        'vrc.v_ih',
-        'vrc.v_kk',
-        'vrc.v_nn',
-        'vrc.v_oh',
-        'vrc.v_ou',
-        'vrc.v_pp',
-        'vrc.v_rr',
-        'vrc.v_sil',
-        'vrc.v_ss',
-        'vrc.v_th',
-        'Basis Original'
-    ]
-
-    for shape in shape_key_order:
-        if shape not in order:
-            order.append(shape)
+    job = SortShapeKeysJob(mesh, core_shape_keys.shape_key_order(shape_key_order))
 
     wm = bpy.context.window_manager
-    current_step = 0
-    wm.progress_begin(current_step, len(order))
-
-    i = 0
-    for name in order:
-        if name == 'Basis' and 'Basis' not in mesh.data.shape_keys.key_blocks:
-            i += 1
-            current_step += 1
-            wm.progress_update(current_step)
-            continue
-
-        for index, shape_key in enumerate(mesh.data.shape_keys.key_blocks):
-            if shape_key.name == name:
-                mesh.active_shape_key_index = index
-                new_index = i
-                index_diff = (index - new_index)
-
-                if new_index >= len(mesh.data.shape_keys.key_blocks):
-                    bpy.ops.object.shape_key_move(type='BOTTOM')
-                    break
-
-                position_correct = False
-                if 0 <= index_diff <= (new_index - 1):
-                    while position_correct is False:
-                        if mesh.active_shape_key_index != new_index:
-                            bpy.ops.object.shape_key_move(type='UP')
-                        else:
-                            position_correct = True
-                else:
-                    if mesh.active_shape_key_index > new_index:
-                        bpy.ops.object.shape_key_move(type='TOP')
-
-                    position_correct = False
-                    while position_correct is False:
-                        if mesh.active_shape_key_index != new_index:
-                            bpy.ops.object.shape_key_move(type='DOWN')
-                        else:
-                            position_correct = True
-
-                i += 1
-                break
-
-        current_step += 1
-        wm.progress_update(current_step)
-
-    mesh.active_shape_key_index = 0
-
-    wm.progress_end()
\ No newline at end of file
+    wm.progress_begin(0, job.total)
+    for step in job.steps():
+        wm.progress_update(step)
+    wm.progress_end()
@@ -0,0 +1,156 @@
+
+# Blender imports
+import bpy
+import numpy as np
+
+from mathutils import kdtree
+
+from bpy.props import (FloatProperty,
+                       IntProperty)
+
+# CreatureTime imports
+from . import common
+from .. import adapters
+from .. import resources
+from ..core import shape_keys as core_shape_keys
+
+
+def build_kdtree(co):
+    """
+    Returns a balanced KD-tree of the flat coordinates `co`, build it once and query it per LOD.
+    """
+    co = co.reshape(-1, 3)
+    kd = kdtree.KDTree(len(co))
+    for index, vertex in enumerate(co):
+        kd.insert(vertex, index)
+    kd.balance()
+    return kd
+
+
+def nearest_vertices(kd, target_co):
+    """
+    Returns the index of the nearest vertex in the KD-tree for every vertex in `target_co`.
+    """
+    target_co = target_co.reshape(-1, 3)
+    return np.fromiter((kd.find(vertex)[1] for vertex in target_co), dtype=np.int64, count=len(target_co))
+
+
+class _GenerateLODs(bpy.types.Operator):
+    """
+    Generates decimated LOD meshes that keep every shape key and vertex group.
+    """
+
+    bl_label = "Generate LODs"
+    bl_idname = "creaturetime.generate_lods"
+    bl_description = "Generates decimated LOD meshes that keep every shape key and vertex group."
+    bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
+
+    lod_count: IntProperty(name='LOD Count', min=1, max=8, default=2)
+    ratio: FloatProperty(name='Ratio', description='Decimation ratio between LOD levels',
+                         min=0.01, max=1.0, default=0.5)
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and bool(common.get_meshes(context))
+
+    def execute(self, context):
+        for obj in common.get_meshes(context):
+            lods = self.generate(context, obj)
+            self.report({'INFO'}, '%s: generated %d LODs' % (obj.name, len(lods)))
+        return {'FINISHED'}
+
+    def evaluate_basis(self, context, obj, ratio):
+        """
+        Returns a new mesh of the basis shape decimated to `ratio`, without other modifiers.
+        """
+        show_viewport = [modifier.show_viewport for modifier in obj.modifiers]
+        show_only_shape_key = obj.show_only_shape_key
+        active_shape_key_index = obj.active_shape_key_index
+
+        for modifier in obj.modifiers:
+            modifier.show_viewport = False
+        obj.show_only_shape_key = True
+        obj.active_shape_key_index = 0
+
+        decimate = obj.modifiers.new('CreatureTime LOD', 'DECIMATE')
+        decimate.ratio = ratio
+        try:
+            depsgraph = context.evaluated_depsgraph_get()
+            depsgraph.update()
+            mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph),
+                                                   preserve_all_data_layers=True, depsgraph=depsgraph)
+        finally:
+            obj.modifiers.remove(decimate)
+            for modifier, show in zip(obj.modifiers, show_viewport):
+                modifier.show_viewport = show
+            obj.show_only_shape_key = show_only_shape_key
+            obj.active_shape_key_index = active_shape_key_index
+
+        return mesh
+
+    def generate(self, context, obj):
+        mesh = obj.data
+        kbs = mesh.shape_keys.key_blocks if mesh.shape_keys else ()
+        basis = adapters.get_coords(kbs[0].data if kbs else mesh.vertices)
+
+        # Gather every shape key and the source KD-tree once, all LODs are mapped from them
+        coords = np.empty((len(kbs), len(basis)), dtype=np.float32)
+        for index, kb in enumerate(kbs):
+            adapters.get_coords(kb.data, coords[index])
+        weights = adapters.get_weight_matrix(obj)
+        kd = build_kdtree(basis)
+
+        lods = []
+        for level in range(1, self.lod_count + 1):
+            lod_mesh = self.evaluate_basis(context, obj, self.ratio ** level)
+            lod_mesh.name = '%s_LOD%d' % (mesh.name, level)
+            lod_basis = adapters.get_coords(lod_mesh.vertices)
+
+            # Map vertices once per LOD, keys and weights share the mapping
+            vertex_map = nearest_vertices(kd, lod_basis)
+
+            lod = obj.copy()
+            lod.data = lod_mesh
+            lod.name = '%s_LOD%d' % (obj.name, level)
+            for collection in obj.users_collection:
+                collection.objects.link(lod)
+
+            lod.vertex_groups.clear()
+            for group in obj.vertex_groups:
+                lod.vertex_groups.new(name=group.name)
+            adapters.set_weight_matrix(lod, weights.take(vertex_map))
+
+            if kbs:
+                lod_coords = core_shape_keys.remap_keys(coords, basis, vertex_map, lod_basis)
+                for index, kb in enumerate(kbs):
+                    lod_kb = lod.shape_key_add(name=kb.name, from_mix=False)
+                    adapters.set_coords(lod_kb.data, lod_coords[index])
+                    for setting in common.SHAPE_KEY_SETTINGS:
+                        setattr(lod_kb, setting, getattr(kb, setting))
+
+                lod_kbs = lod_mesh.shape_keys.key_blocks
+                lod_mesh.shape_keys.use_relative = mesh.shape_keys.use_relative
+                for kb, lod_kb in zip(kbs, lod_kbs):
+                    lod_kb.relative_key = lod_kbs[kb.relative_key.name]
+
+            lods.append(lod)
+
+        return lods
+
+
+def apply_operators(self, _):
+    layout = self.layout
+    layout.operator(_GenerateLODs.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
+    layout.separator()
+
+
+def register():
+    bpy.utils.register_class(_GenerateLODs)
+
+    bpy.types.MESH_MT_shape_key_context_menu.append(apply_operators)
+
+
+def unregister():
+    bpy.types.MESH_MT_shape_key_context_menu.remove(apply_operators)
+
+    bpy.utils.unregister_class(_GenerateLODs)
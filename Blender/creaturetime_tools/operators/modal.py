@@ -0,0 +1,135 @@
+
+# Python imports
+import time
+
+# Blender imports
+import bpy
+
+# Viewport navigation events passed through while a job runs, everything else is blocked
+# so undo, mode switches or edits cannot invalidate the data the job is working on.
+_NAVIGATION_EVENTS = {'MIDDLEMOUSE', 'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE'}
+_NAVIGATION_PREFIXES = ('WHEEL', 'TRACKPAD', 'NDOF')
+
+
+class Job(object):
+    """
+    Work that runs in small steps and can be rolled back.
+    """
+
+    # Number of steps, may be refined while the job runs.
+    total = 0
+
+    def steps(self):
+        """
+        Generator doing one unit of work per step, yields the number of finished steps.
+        """
+        raise NotImplementedError()
+
+    def rollback(self):
+        """
+        Reverts the steps that have run so far.
+        """
+        raise NotImplementedError()
+
+    def run(self):
+        for _ in self.steps():
+            pass
+
+
+class ChainJob(Job):
+    """
+    Runs jobs one after another, rolling back every started job on cancel.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.__started = []
+
+    @property
+    def total(self):
+        return sum(job.total for job in self.jobs)
+
+    def steps(self):
+        done = 0
+        for job in self.jobs:
+            self.__started.append(job)
+            for step in job.steps():
+                yield done + step
+            done += job.total
+
+    def rollback(self):
+        for job in reversed(self.__started):
+            job.rollback()
+        self.__started.clear()
+
+
+class ModalOperator(object):
+    """
+    Mixin for operators that run a `Job` in time budgeted slices on a timer.
+
+    The UI keeps redrawing between slices and the viewport can be navigated,
+    other input is blocked. Esc cancels and rolls back the job.
+    `execute` runs the whole job at once, for scripts, redo and background mode.
+    """
+
+    # Seconds of work done per timer event.
+    time_budget = 0.05
+
+    def create_job(self, context):
+        raise NotImplementedError()
+
+    def finish(self, context, job):
+        return {'FINISHED'}
+
+    def execute(self, context):
+        job = self.create_job(context)
+        job.run()
+        return self.finish(context, job)
+
+    def invoke(self, context, event):
+        if bpy.app.background:
+            return self.execute(context)
+
+        self.__job = self.create_job(context)
+        self.__steps = self.__job.steps()
+
+        wm = context.window_manager
+        self.__timer = wm.event_timer_add(0.001, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, max(self.__job.total, 1))
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.__job.rollback()
+            self.__end(context)
+            self.report({'WARNING'}, '%s cancelled' % self.bl_label)
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            if event.type in _NAVIGATION_EVENTS or event.type.startswith(_NAVIGATION_PREFIXES):
+                return {'PASS_THROUGH'}
+            return {'RUNNING_MODAL'}
+
+        deadline = time.perf_counter() + self.time_budget
+        try:
+            done = next(self.__steps)
+            while time.perf_counter() < deadline:
+                done = next(self.__steps)
+        except StopIteration:
+            self.__end(context)
+            return self.finish(context, self.__job)
+        except Exception:
+            self.__job.rollback()
+            self.__end(context)
+            raise
+
+        context.window_manager.progress_update(done)
+        context.workspace.status_text_set('%s: %d / %d (Esc to cancel)' % (self.bl_label, done, self.__job.total))
+        return {'RUNNING_MODAL'}
+
+    def __end(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.__timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
@@ -1,68 +1,221 @@
 
+# Python imports
+import json
+
 # Blender imports
 import bpy
+import numpy as np
+
+from bpy.props import BoolProperty
 
 # CreatureTime imports
 from . import common
+from . import modal
+from .. import adapters
 from .. import resources
+from ..core import shape_keys as core_shape_keys
+
+# Text datablock recording which shape keys were merged into which
+REMAP_TEXT = 'CreatureTime Shape Key Remap'
+
+# Tolerance to small differences between duplicate shape keys
+DUPLICATE_TOLERANCE = 0.001
+
+# Non-scripted driver types rewritten as an expression of their variables when scaled
+_DRIVER_EXPRESSIONS = {
+    'SUM': lambda names: ' + '.join(names),
+    'AVERAGE': lambda names: '(%s) / %d' % (' + '.join(names), len(names)),
+    'MIN': lambda names: 'min(%s)' % ', '.join(names),
+    'MAX': lambda names: 'max(%s)' % ', '.join(names),
+}
+
+# Datablock collections searched for drivers that read shape key values
+_DRIVER_COLLECTIONS = ('objects', 'meshes', 'shape_keys', 'armatures', 'materials', 'node_groups', 'scenes')
+
 
 class _RemoveUnusedShapeKeys(bpy.types.Operator):
     """
-    Delete Blend Shapes with no assigned weight of active object
+    Delete Blend Shapes with no assigned weight of selected objects
     """
 
     bl_label = "Remove Unused Blend Shapes"
     bl_idname = "creaturetime.remove_unused_blend_shapes"
-    bl_description = "Delete Blend Shapes with no assigned weight of active object."
+    bl_description = "Delete Blend Shapes with no assigned weight of selected objects."
     bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
 
     # Tolerance to small differences, change it if you want
     __Tolerance = 0.001
 
+    @staticmethod
+    def can_run(obj):
+        return bool(obj.data.shape_keys and obj.data.shape_keys.use_relative)
+
     @classmethod
     def poll(cls, context):
-        return (context.mode == 'OBJECT' and
-                context.object.data.shape_keys and
-                context.object.data.shape_keys.use_relative)
+        return context.mode == 'OBJECT' and bool(common.get_meshes(context, cls.can_run))
+
+    @staticmethod
+    def find_unused(obj, buffers):
+        """
+        Returns the names of the shape keys that do not move any vertex from their relative key.
+        """
+        unused = []
+
+        for kb, locs, rel_locs in adapters.iter_key_deltas(obj, buffers):
+            if core_shape_keys.is_unused(locs, rel_locs, _RemoveUnusedShapeKeys.__Tolerance):
+                unused.append(kb.name)
+
+        return unused
 
     def execute(self, context):
-        import numpy as np
+        # Buffers are shared by all objects, so only the largest mesh allocates.
+        buffers = adapters.Buffers()
 
-        obj = context.object
+        for obj in common.get_meshes(context, self.can_run):
+            to_delete = self.find_unused(obj, buffers)
 
-        kbs = obj.data.shape_keys.key_blocks
-        vertices = len(obj.data.vertices)
-        to_delete = []
+            for kb_name in to_delete:
+                obj.shape_key_remove(obj.data.shape_keys.key_blocks[kb_name])
 
-        # Cache locs for rel keys since many keys have the same rel key
-        cache = {}
+            self.report({'INFO'}, '%s: removed %d blend shapes' % (obj.name, len(to_delete)))
 
-        locs = np.empty(3 * vertices, dtype=np.float32)
+        return {'FINISHED'}
 
-        for kb in kbs:
-            if kb == kb.relative_key: continue
 
-            kb.data.foreach_get("co", locs)
+class ApplyShapeKeyAsBasisJob(modal.Job):
+    """
+    Applies the active shape key of an object to its basis.
+
+    Shape key coordinates are rewritten in place, one key per step, instead of
+    re-mixing every key through new shape keys. Only the vertices that change
+    are remembered, which keeps rollback cheap on large meshes.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.name = obj.active_shape_key.name
+        self.reverted_name = None
+
+        kbs = obj.data.shape_keys.key_blocks
+        self.__index = obj.active_shape_key_index
+        self.__names = [kb.name for kb in kbs]
+        self.__relatives = [kb.relative_key.name for kb in kbs]
+        self.__values = [kb.value for kb in kbs]
+        self.__show_only_shape_key = obj.show_only_shape_key
+        self.__changes = []
+        self.__old_basis = None
+        self.__sort = None
+
+        # One step per shape key, plus sorting the shape keys afterwards.
+        self.total = len(kbs) + len(core_shape_keys.DEFAULT_ORDER)
+
+    @staticmethod
+    def can_apply(obj):
+        shape_key = obj.active_shape_key
+        return not (' - Reverted' in shape_key.name and shape_key.relative_key.name != 'Basis')
+
+    def steps(self):
+        obj = self.obj
+        kbs = obj.data.shape_keys.key_blocks
+        basis = kbs[0]
+        new_basis_shape_key = kbs[self.__index]
+
+        # Keep the current value of the new basis shape key, or apply it fully
+        value = new_basis_shape_key.value or 1.0
 
+        # Cache locs for rel keys before any of them are rewritten
+        cache = {}
+        for kb in kbs:
             if kb.relative_key.name not in cache:
-                rel_locs = np.empty(3 * vertices, dtype=np.float32)
-                kb.relative_key.data.foreach_get("co", rel_locs)
-                cache[kb.relative_key.name] = rel_locs
-            rel_locs = cache[kb.relative_key.name]
+                cache[kb.relative_key.name] = adapters.get_coords(kb.relative_key.data)
+        old_basis = cache.setdefault(basis.name, adapters.get_coords(basis.data))
+        new_basis_locs = adapters.get_coords(new_basis_shape_key.data)
+        new_basis = old_basis + value * (new_basis_locs - cache[new_basis_shape_key.relative_key.name])
+
+        # Mix every shape key with the new basis
+        locs = None
+        for index, kb in enumerate(kbs):
+            if index == 0 or index == self.__index:
+                continue
+
+            if ' - Reverted' in kb.name:
+                # Reverted shape keys keep pointing to the old basis
+                if kb.relative_key == basis:
+                    kb.relative_key = new_basis_shape_key
+                continue
+
+            locs = adapters.get_coords(kb.data, locs)
+            offset = new_basis - cache[kb.relative_key.name]
+            changed = np.flatnonzero(offset)
+            self.__changes.append((index, changed, locs[changed]))
+            locs[changed] += offset[changed]
+            adapters.set_coords(kb.data, locs)
+            kb.relative_key = basis
+            yield index
+
+        # Turn the applied shape key into the reverted one, holding the old basis
+        self.__changes.append((self.__index, slice(None), new_basis_locs))
+        adapters.set_coords(new_basis_shape_key.data, old_basis)
+        new_basis_shape_key.relative_key = basis
+        self.__old_basis = old_basis
+
+        adapters.set_coords(basis.data, new_basis)
+        adapters.set_coords(obj.data.vertices, new_basis)
+        obj.data.update()
 
-            locs -= rel_locs
-            if (np.abs(locs) < _RemoveUnusedShapeKeys.__Tolerance).all():
-                to_delete.append(kb.name)
+        obj.show_only_shape_key = False
+        for kb in kbs:
+            kb.value = 0.0
 
-        for kb_name in to_delete:
-            obj.shape_key_remove(obj.data.shape_keys.key_blocks[kb_name])
+        basis.name = 'Basis'
+        new_basis_shape_key.name = self.name + ' - Reverted'
 
-        return {'FINISHED'}
+        # If a reversed shape key was applied as basis, fix the name
+        if ' - Reverted - Reverted' in new_basis_shape_key.name:
+            new_basis_shape_key.name = new_basis_shape_key.name.replace(' - Reverted - Reverted', '')
+        self.reverted_name = new_basis_shape_key.name
+        yield len(kbs)
 
+        # Repair important shape key order
+        done = len(kbs)
+        common.set_active(obj)
+        self.__sort = common.SortShapeKeysJob(obj, core_shape_keys.shape_key_order())
+        self.total = done + self.__sort.total
+        for step in self.__sort.steps():
+            yield done + step
+
+    def rollback(self):
+        obj = self.obj
+        if self.__sort:
+            self.__sort.rollback()
+            self.__sort = None
 
-class _ApplyShapeKeyAsBasis(bpy.types.Operator):
+        kbs = obj.data.shape_keys.key_blocks
+        for kb, name in zip(kbs, self.__names):
+            if kb.name != name:
+                kb.name = name
+        for kb, relative, value in zip(kbs, self.__relatives, self.__values):
+            kb.relative_key = kbs[relative]
+            kb.value = value
+        obj.show_only_shape_key = self.__show_only_shape_key
+
+        locs = None
+        for index, changed, old_locs in reversed(self.__changes):
+            locs = adapters.get_coords(kbs[index].data, locs)
+            locs[changed] = old_locs
+            adapters.set_coords(kbs[index].data, locs)
+        self.__changes.clear()
+
+        if self.__old_basis is not None:
+            adapters.set_coords(kbs[0].data, self.__old_basis)
+            adapters.set_coords(obj.data.vertices, self.__old_basis)
+            obj.data.update()
+            self.__old_basis = None
+
+
+class _ApplyShapeKeyAsBasis(modal.ModalOperator, bpy.types.Operator):
     """
-    Applies current selected shape key to the basis.
+    Applies current selected shape key to the basis of selected objects.
     Credit goes to deprecated Cats Blender Plugin.
     """
 
@@ -71,103 +224,181 @@ class _ApplyShapeKeyAsBasis(bpy.types.Operator):
     bl_description = "Applies current selected shape key to the basis."
     bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
 
+    @staticmethod
+    def can_run(obj):
+        return bool(obj.active_shape_key and obj.active_shape_key_index > 0)
+
     @classmethod
     def poll(cls, context):
-        return context.object.active_shape_key and context.object.active_shape_key_index > 0
+        return context.mode == 'OBJECT' and bool(common.get_meshes(context, cls.can_run))
+
+    def create_job(self, context):
+        jobs = []
+        for obj in common.get_meshes(context, self.can_run):
+            if not ApplyShapeKeyAsBasisJob.can_apply(obj):
+                self.report({'WARNING'}, '%s: cannot apply a reverted shape key' % obj.name)
+                continue
+            jobs.append(ApplyShapeKeyAsBasisJob(obj))
+        return modal.ChainJob(jobs)
+
+    def finish(self, context, job):
+        for obj_job in job.jobs:
+            if obj_job.reverted_name == obj_job.name.replace(' - Reverted', ''):
+                self.report({'INFO'}, '%s: removed shape key %s' % (obj_job.obj.name, obj_job.reverted_name))
+            else:
+                self.report({'INFO'}, '%s: applied shape key %s as basis' % (obj_job.obj.name, obj_job.name))
+        return {'FINISHED'}
 
-    def execute(self, context):
-        obj = context.object
-
-        # Get shape key which will be the new basis
-        new_basis_shape_key = obj.active_shape_key
-        new_basis_shape_key_name = new_basis_shape_key.name
-        new_basis_shape_key_value = new_basis_shape_key.value
-
-        # Check for reverted shape keys
-        if ' - Reverted' in new_basis_shape_key_name and new_basis_shape_key.relative_key.name != 'Basis':
-            for shapekey in obj.data.shape_keys.key_blocks:
-                if ' - Reverted' in shapekey.name and shapekey.relative_key.name == 'Basis':
-                    # TODO: Include error message.
-                    # Common.show_error(t('ShapeKeyApplier.error.revert.scale'), t('ShapeKeyApplier.error.revert', name=shapekey.name))
-                    return {'FINISHED'}
-
-            # TODO: Include error message.
-            # Common.show_error(t('ShapeKeyApplier.error.revert.scale'), t('ShapeKeyApplier.error.revert'))
-            return {'FINISHED'}
-
-        # Set up shape keys
-        obj.show_only_shape_key = False
-        bpy.ops.object.shape_key_clear()
-
-        # Create a copy of the new basis shape key to make its current value stay as it is
-        new_basis_shape_key.value = new_basis_shape_key_value
-        if new_basis_shape_key_value == 0:
-            new_basis_shape_key.value = 1
-        new_basis_shape_key.name = new_basis_shape_key_name + '--Old'
-
-        # Replace old new basis with new new basis
-        new_basis_shape_key = obj.shape_key_add(name=new_basis_shape_key_name, from_mix=True)
-        new_basis_shape_key.value = 1
-
-        # Delete the old one
-        for index in reversed(range(0, len(obj.data.shape_keys.key_blocks))):
-            obj.active_shape_key_index = index
-            shapekey = obj.active_shape_key
-            if shapekey.name == new_basis_shape_key_name + '--Old':
-                bpy.ops.object.shape_key_remove(all=False)
-                break
-
-        # Find old basis and rename it
-        old_basis_shape_key = obj.data.shape_keys.key_blocks[0]
-        old_basis_shape_key.name = new_basis_shape_key_name + ' - Reverted'
-        old_basis_shape_key.relative_key = new_basis_shape_key
-
-        # Rename new basis after old basis was renamed
-        new_basis_shape_key.name = 'Basis'
-
-        # Mix every shape keys with the new basis
-        for index in range(0, len(obj.data.shape_keys.key_blocks)):
-            obj.active_shape_key_index = index
-            shapekey = obj.active_shape_key
-            if shapekey and shapekey.name != 'Basis' and ' - Reverted' not in shapekey.name:
-                shapekey.value = 1
-                obj.shape_key_add(name=shapekey.name + '-New', from_mix=True)
-                shapekey.value = 0
-
-        # Remove all the unmixed shape keys except basis and the reverted ones
-        for index in reversed(range(0, len(obj.data.shape_keys.key_blocks))):
-            obj.active_shape_key_index = index
-            shapekey = obj.active_shape_key
-            if shapekey and not shapekey.name.endswith('-New') and shapekey.name != 'Basis' and ' - Reverted' not in shapekey.name:
-                bpy.ops.object.shape_key_remove(all=False)
-
-        # Fix the names and the relative shape key
-        for index, shapekey in enumerate(obj.data.shape_keys.key_blocks):
-            if shapekey and shapekey.name.endswith('-New'):
-                shapekey.name = shapekey.name[:-4]
-                shapekey.relative_key = new_basis_shape_key
 
-        # Repair important shape key order
-        common.sort_shape_keys(obj)
+class _ApplyModifiersWithShapeKeys(bpy.types.Operator):
+    """
+    Applies the modifiers of selected objects while keeping their shape keys.
+    """
 
-        # Correctly apply the new basis as basis (important step, doesn't work otherwise)
-        common.switch('EDIT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.mesh.remove_doubles(threshold=0)
-        common.switch('OBJECT')
+    bl_label = "Apply Modifiers With Shape Keys"
+    bl_idname = "creaturetime.apply_modifiers_with_shape_keys"
+    bl_description = "Applies modifiers while keeping shape keys."
+    bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
 
-        # If a reversed shape key was applied as basis, fix the name
-        if ' - Reverted - Reverted' in old_basis_shape_key.name:
-            old_basis_shape_key.name = old_basis_shape_key.name.replace(' - Reverted - Reverted', '')
-            # TODO: REPORT
-            pass
-            # self.report({'INFO'}, t('ShapeKeyApplier.successRemoved', name=old_basis_shape_key.name))
-        else:
-            # TODO: REPORT
-            pass
-            # self.report({'INFO'}, t('ShapeKeyApplier.successSet', name=new_basis_shape_key_name))
+    keep_armature: BoolProperty(name='Keep Armature',
+                                description='Keep armature modifiers instead of applying them',
+                                default=True)
+
+    @staticmethod
+    def can_run(obj):
+        return bool(common.has_shape_keys(obj) and obj.modifiers)
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and bool(common.get_meshes(context, cls.can_run))
+
+    def execute(self, context):
+        buffers = adapters.Buffers()
+        for obj in common.get_meshes(context, self.can_run):
+            self.apply(context, obj, buffers)
         return {'FINISHED'}
 
+    def apply(self, context, obj, buffers):
+        modifiers = [modifier for modifier in obj.modifiers
+                     if modifier.show_viewport and not (self.keep_armature and modifier.type == 'ARMATURE')]
+        if not modifiers:
+            return
+
+        kbs = obj.data.shape_keys.key_blocks
+        unused = set(_RemoveUnusedShapeKeys.find_unused(obj, buffers))
+        settings = [(kb.name, kb.relative_key.name, [getattr(kb, setting) for setting in common.SHAPE_KEY_SETTINGS]) for kb in kbs]
+
+        # Only evaluate the applied modifiers
+        show_viewport = [modifier.show_viewport for modifier in obj.modifiers]
+        show_only_shape_key = obj.show_only_shape_key
+        active_shape_key_index = obj.active_shape_key_index
+        for modifier in obj.modifiers:
+            modifier.show_viewport = modifier in modifiers
+        obj.show_only_shape_key = True
+
+        # A muted key evaluates as its reference key and a vertex group masks it again
+        # when restored from the settings, so evaluate every key unmuted and unmasked
+        for kb in kbs:
+            kb.mute = False
+            kb.vertex_group = ''
+
+        try:
+            depsgraph = context.evaluated_depsgraph_get()
+            obj.active_shape_key_index = 0
+            depsgraph.update()
+            mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph),
+                                                   preserve_all_data_layers=True, depsgraph=depsgraph)
+
+            # Evaluate the modifier stack once per shape key that moves vertices
+            coords = np.empty((len(kbs), 3 * len(mesh.vertices)), dtype=np.float32)
+            adapters.get_coords(mesh.vertices, coords[0])
+            for index, kb in enumerate(kbs):
+                if index == 0 or kb.name in unused:
+                    continue
+
+                obj.active_shape_key_index = index
+                depsgraph.update()
+                key_eval = obj.evaluated_get(depsgraph)
+                mesh_eval = key_eval.to_mesh()
+                try:
+                    if len(mesh_eval.vertices) != len(mesh.vertices):
+                        self.report({'ERROR'}, '%s: modifiers change the vertex count of shape key %s' % (obj.name, kb.name))
+                        bpy.data.meshes.remove(mesh)
+                        return
+                    adapters.get_coords(mesh_eval.vertices, coords[index])
+                finally:
+                    key_eval.to_mesh_clear()
+
+            # Unused shape keys match their relative key, so they evaluate the same
+            for index, kb in enumerate(kbs):
+                if index == 0 or kb.name not in unused:
+                    continue
+                relative = kb.relative_key
+                while relative.name in unused and relative != relative.relative_key:
+                    relative = relative.relative_key
+                coords[index] = coords[kbs.find(relative.name)]
+        finally:
+            for modifier, show in zip(obj.modifiers, show_viewport):
+                modifier.show_viewport = show
+            obj.show_only_shape_key = show_only_shape_key
+            obj.active_shape_key_index = active_shape_key_index
+            for kb, (_, _, values) in zip(kbs, settings):
+                for setting, value in zip(common.SHAPE_KEY_SETTINGS, values):
+                    if setting in ('mute', 'vertex_group'):
+                        setattr(kb, setting, value)
+
+        # Rebuild the shape keys on the applied mesh in one pass
+        old_mesh = obj.data
+        use_relative = old_mesh.shape_keys.use_relative
+
+        obj.data = mesh
+        for modifier in modifiers:
+            obj.modifiers.remove(modifier)
+
+        for index, (name, _, values) in enumerate(settings):
+            kb = obj.shape_key_add(name=name, from_mix=False)
+            adapters.set_coords(kb.data, coords[index])
+            for setting, value in zip(common.SHAPE_KEY_SETTINGS, values):
+                setattr(kb, setting, value)
+
+        new_kbs = mesh.shape_keys.key_blocks
+        mesh.shape_keys.use_relative = use_relative
+        for kb, (_, relative, _) in zip(new_kbs, settings):
+            kb.relative_key = new_kbs[relative]
+        obj.active_shape_key_index = active_shape_key_index
+
+        name = old_mesh.name
+        if not old_mesh.users:
+            bpy.data.meshes.remove(old_mesh)
+        mesh.name = name
+
+        self.report({'INFO'}, '%s: applied %d modifiers, evaluated %d of %d shape keys' % (
+            obj.name, len(modifiers), len(settings) - len(unused) - 1, len(settings) - 1))
+
+
+class _SortShapeKeys(modal.ModalOperator, bpy.types.Operator):
+    """
+    Sorts the shape keys of selected objects into the VRChat viseme order.
+    """
+
+    bl_label = "Sort Shape Keys"
+    bl_idname = "creaturetime.sort_shape_keys"
+    bl_description = "Sorts shape keys into the VRChat viseme order."
+    bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
+
+    @staticmethod
+    def can_run(obj):
+        return common.has_shape_keys(obj)
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and bool(common.get_meshes(context, cls.can_run))
+
+    def create_job(self, context):
+        order = core_shape_keys.shape_key_order()
+        return modal.ChainJob(common.SortShapeKeysJob(obj, order)
+                              for obj in common.get_meshes(context, self.can_run))
+
 
 class _SelectAffectedShapeKeyVertices(bpy.types.Operator):
     """
@@ -181,27 +412,221 @@ class _SelectAffectedShapeKeyVertices(bpy.types.Operator):
 
     __Tolerance = 1e-5
 
+    @staticmethod
+    def can_run(obj):
+        return bool(obj.active_shape_key and obj.active_shape_key_index > 0 and
+                    'Basis' in obj.data.shape_keys.key_blocks)
+
     @classmethod
     def poll(cls, context):
-        return context.object.active_shape_key and context.object.active_shape_key_index > 0
+        return bool(common.get_meshes(context, cls.can_run))
 
     def execute(self, context):
-        obj = bpy.context.active_object
-
-        shape_keys = obj.data.shape_keys.key_blocks
-        sk1_data = context.object.active_shape_key.data
-        skb_data = shape_keys['Basis'].data
+        objs = common.get_meshes(context, self.can_run)
 
-        bpy.ops.object.mode_set(mode="EDIT")
+        common.switch_all(objs, 'EDIT')
         bpy.ops.mesh.select_all(action="DESELECT")
         bpy.ops.mesh.select_mode(type="VERT")
-        bpy.ops.object.mode_set(mode="OBJECT")
+        common.switch_all(objs, 'OBJECT')
+
+        buffers = adapters.Buffers()
+        for obj in objs:
+            shape_keys = obj.data.shape_keys.key_blocks
+            locs = buffers.coords('locs', obj.active_shape_key.data)
+            rel_locs = buffers.coords('relative', shape_keys['Basis'].data)
+
+            affected = core_shape_keys.affected_vertices(locs, rel_locs, _SelectAffectedShapeKeyVertices.__Tolerance)
+            obj.data.vertices.foreach_set('select', affected)
+            self.report({'INFO'}, '%s: selected %d vertices' % (obj.name, affected.sum()))
+
+        common.switch_all(objs, 'EDIT')
 
-        for i, (x, y) in enumerate(zip(sk1_data, skb_data)):
-            if (x.co - y.co).length > _SelectAffectedShapeKeyVertices.__Tolerance:
-                obj.data.vertices[i].select = True
+        return {'FINISHED'}
+
+
+def find_duplicate_shape_keys(obj, buffers):
+    """
+    Returns (kept name, [(duplicate name, scale)]) for every cluster of shape keys
+    that move the same vertices the same way, up to a scale factor.
+    """
+    finder = core_shape_keys.DuplicateFinder(DUPLICATE_TOLERANCE)
+    for kb, locs, rel_locs in adapters.iter_key_deltas(obj, buffers):
+        finder.add(kb.name, locs, rel_locs, (kb.relative_key.name, kb.vertex_group))
 
-        bpy.ops.object.mode_set(mode="EDIT")
+    return finder.clusters()
+
+
+def scale_driver(fcurve, scale):
+    """
+    Multiplies the output of a driver by `scale`, returns False if the driver cannot be scaled.
+    """
+    if abs(scale - 1.0) < 1e-6:
+        return True
+    if len(fcurve.keyframe_points):
+        return False
+
+    driver = fcurve.driver
+    if driver.type == 'SCRIPTED':
+        expression = driver.expression
+    else:
+        variables = [variable.name for variable in driver.variables]
+        if not variables:
+            return False
+        expression = _DRIVER_EXPRESSIONS[driver.type](variables)
+        driver.type = 'SCRIPTED'
+    driver.expression = '(%s) * %s' % (expression, round(scale, 6))
+    return True
+
+
+def driver_read_paths(obj):
+    """
+    Returns the data paths, relative to the shape keys of `obj`, that driver variables anywhere in the file read.
+    """
+    mesh = obj.data
+    prefixes = {mesh.shape_keys: '', mesh: 'shape_keys.'}
+    paths = []
+    for collection in _DRIVER_COLLECTIONS:
+        for id_data in getattr(bpy.data, collection):
+            animation_data = getattr(id_data, 'animation_data', None)
+            if not animation_data:
+                continue
+            for fcurve in animation_data.drivers:
+                for variable in fcurve.driver.variables:
+                    if variable.type != 'SINGLE_PROP':
+                        continue
+                    target = variable.targets[0]
+                    if target.id is not None and getattr(target.id, 'data', None) == mesh:
+                        prefix = 'data.shape_keys.'
+                    else:
+                        prefix = prefixes.get(target.id)
+                    if prefix is not None and target.data_path.startswith(prefix):
+                        paths.append(target.data_path[len(prefix):])
+    return paths
+
+
+def merge_shape_keys(obj, kept, duplicates):
+    """
+    Removes the duplicates of the `kept` shape key and retargets their drivers to it.
+
+    Duplicates that other keys are relative to, that are keyframed, that
+    drivers read, or whose driver or value cannot be carried over to the kept
+    key are left alone, so merging never changes the shape. Returns
+    {removed name: {'target': kept name, 'scale': scale}} and {skipped name: reason}.
+    """
+    shape_keys = obj.data.shape_keys
+    kbs = shape_keys.key_blocks
+    if kept not in kbs:
+        return {}, {}
+
+    relatives = {kb.relative_key.name for kb in kbs if kb != kb.relative_key}
+    animation_data = shape_keys.animation_data
+    drivers = {fcurve.data_path: fcurve for fcurve in animation_data.drivers} if animation_data else {}
+    animated = ({fcurve.data_path for fcurve in animation_data.action.fcurves}
+                if animation_data and animation_data.action else set())
+
+    read_paths = driver_read_paths(obj)
+
+    kept_kb = kbs[kept]
+    kept_path = kept_kb.path_from_id('value')
+    removed = {}
+    skipped = {}
+    for name, scale in duplicates:
+        kb = kbs.get(name)
+        if kb is None:
+            continue
+        if name in relatives:
+            skipped[name] = 'other shape keys are relative to it'
+            continue
+        path = kb.path_from_id('value')
+        if path in animated:
+            skipped[name] = 'it is keyframed'
+            continue
+        key_path = kb.path_from_id()
+        if any(read_path.startswith(key_path) for read_path in read_paths):
+            skipped[name] = 'drivers read its value'
+            continue
+
+        fcurve = drivers.get(path)
+        if fcurve is not None:
+            if kept_path in drivers:
+                skipped[name] = '%s has a driver too' % kept
+                continue
+            if kept_kb.value and not kept_kb.mute:
+                skipped[name] = 'it has a driver and %s has a value' % kept
+                continue
+            if not scale_driver(fcurve, scale):
+                skipped[name] = 'its driver cannot be scaled'
+                continue
+            fcurve.data_path = kept_path
+            drivers[kept_path] = fcurve
+        elif kb.value and not kb.mute:
+            if kept_path in drivers or kept_kb.mute:
+                skipped[name] = '%s is driven or muted and it has a value' % kept
+                continue
+            value = kept_kb.value + scale * kb.value
+            if not kept_kb.slider_min <= value <= kept_kb.slider_max:
+                skipped[name] = 'its value does not fit the slider of %s' % kept
+                continue
+            kept_kb.value = value
+
+        obj.shape_key_remove(kb)
+        removed[name] = {'target': kept, 'scale': round(scale, 6)}
+
+    return removed, skipped
+
+
+def skipped_message(obj, skipped):
+    return '%s: kept %s' % (obj.name, ', '.join('%s (%s)' % (name, reason) for name, reason in skipped.items()))
+
+
+def write_remap(mesh, removed):
+    """
+    Records merged shape keys in the remap table text datablock, as JSON keyed by mesh name.
+    """
+    text = bpy.data.texts.get(REMAP_TEXT) or bpy.data.texts.new(REMAP_TEXT)
+    try:
+        table = json.loads(text.as_string() or '{}')
+    except ValueError:
+        table = {}
+    table.setdefault(mesh.name, {}).update(removed)
+    text.from_string(json.dumps(table, indent=2, sort_keys=True))
+
+
+class _MergeDuplicateShapeKeys(bpy.types.Operator):
+    """
+    Merges shape keys that duplicate another key, or a scaled version of it, of selected objects
+    """
+
+    bl_label = "Merge Duplicate Blend Shapes"
+    bl_idname = "creaturetime.merge_duplicate_blend_shapes"
+    bl_description = ("Merges blend shapes that duplicate another blend shape, or a scaled version of it, "
+                      "retargeting their drivers. Merged names are recorded in the '%s' text." % REMAP_TEXT)
+    bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and bool(common.get_meshes(context, _RemoveUnusedShapeKeys.can_run))
+
+    def execute(self, context):
+        # Buffers are shared by all objects, so only the largest mesh allocates.
+        buffers = adapters.Buffers()
+
+        for obj in common.get_meshes(context, _RemoveUnusedShapeKeys.can_run):
+            clusters = find_duplicate_shape_keys(obj, buffers)
+            duplicates = sum(len(cluster) for _, cluster in clusters)
+
+            removed = {}
+            skipped = {}
+            for kept, cluster in clusters:
+                cluster_removed, cluster_skipped = merge_shape_keys(obj, kept, cluster)
+                removed.update(cluster_removed)
+                skipped.update(cluster_skipped)
+            if removed:
+                write_remap(obj.data, removed)
+            if skipped:
+                self.report({'WARNING'}, skipped_message(obj, skipped))
+
+            self.report({'INFO'}, '%s: merged %d of %d duplicate blend shapes' % (obj.name, len(removed), duplicates))
 
         return {'FINISHED'}
 
@@ -211,6 +636,9 @@ def apply_operators(self, _):
     layout.operator(_RemoveUnusedShapeKeys.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
     layout.operator(_ApplyShapeKeyAsBasis.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
     layout.operator(_SelectAffectedShapeKeyVertices.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
+    layout.operator(_SortShapeKeys.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
+    layout.operator(_ApplyModifiersWithShapeKeys.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
+    layout.operator(_MergeDuplicateShapeKeys.bl_idname, icon_value=resources.get('default_white_x16').icon_id)
     layout.separator()
 
 
@@ -218,6 +646,9 @@ def register():
     bpy.utils.register_class(_RemoveUnusedShapeKeys)
     bpy.utils.register_class(_ApplyShapeKeyAsBasis)
     bpy.utils.register_class(_SelectAffectedShapeKeyVertices)
+    bpy.utils.register_class(_SortShapeKeys)
+    bpy.utils.register_class(_ApplyModifiersWithShapeKeys)
+    bpy.utils.register_class(_MergeDuplicateShapeKeys)
 
     bpy.types.MESH_MT_shape_key_context_menu.prepend(apply_operators)
 
@@ -228,3 +659,6 @@ def unregister():
     bpy.utils.unregister_class(_RemoveUnusedShapeKeys)
     bpy.utils.unregister_class(_ApplyShapeKeyAsBasis)
     bpy.utils.unregister_class(_SelectAffectedShapeKeyVertices)
+    bpy.utils.unregister_class(_SortShapeKeys)
+    bpy.utils.unregister_class(_ApplyModifiersWithShapeKeys)
+    bpy.utils.unregister_class(_MergeDuplicateShapeKeys)
@@ -0,0 +1,182 @@
+
+# Blender imports
+import bpy
+import numpy as np
+
+from bpy.props import (BoolProperty,
+                       EnumProperty,
+                       StringProperty)
+from bpy_extras.io_utils import (ExportHelper,
+                                 ImportHelper)
+
+# CreatureTime imports
+from . import common
+from .. import adapters
+from ..core import sidecar
+from ..core import vertex_groups as core_vertex_groups
+
+_PRECISIONS = {'FLOAT16': np.float16, 'FLOAT32': np.float32}
+
+
+def iter_shape_key_deltas(obj, buffers, dtype):
+    """
+    Yields (name, relative name, indices, deltas) of every shape key, reading one key at a time.
+    """
+    kbs = obj.data.shape_keys.key_blocks if obj.data.shape_keys else ()
+    basis = buffers.coords('basis', kbs[0].data) if kbs else None
+
+    for kb, locs, rel_locs in adapters.iter_key_deltas(obj, buffers, include_reference=True):
+        if rel_locs is None:
+            yield (kb.name, None) + sidecar.sparse_delta(locs, basis, dtype)
+        else:
+            yield (kb.name, kb.relative_key.name) + sidecar.sparse_delta(locs, rel_locs, dtype)
+
+
+class _ExportSidecar(bpy.types.Operator, ExportHelper):
+    """
+    Writes the shape key deltas and vertex weights of the active mesh to a sidecar file.
+    """
+
+    bl_label = "Export Shape Key Sidecar"
+    bl_idname = "creaturetime.export_sidecar"
+    bl_description = "Writes the shape key deltas and vertex weights of the active mesh to a sidecar file."
+    bl_options = {'REGISTER'}
+
+    filename_ext = '.ctsc'
+    filter_glob: StringProperty(default='*.ctsc', options={'HIDDEN'})
+
+    precision: EnumProperty(
+        name='Precision',
+        items=[('FLOAT32', 'Float32', 'Store shape key offsets at full precision'),
+               ('FLOAT16', 'Float16', 'Store shape key offsets at half precision, halving their size')],
+        default='FLOAT32')
+    include_weights: BoolProperty(name='Vertex Weights', default=True)
+
+    @classmethod
+    def poll(cls, context):
+        obj = common.get_active()
+        return context.mode == 'OBJECT' and obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        obj = common.get_active()
+        mesh = obj.data
+        kbs = mesh.shape_keys.key_blocks if mesh.shape_keys else ()
+
+        buffers = adapters.Buffers()
+        basis = buffers.coords('basis', kbs[0].data if kbs else mesh.vertices)
+        weights = adapters.get_weight_matrix(obj) if self.include_weights else None
+
+        sidecar.write(self.filepath, basis, iter_shape_key_deltas(obj, buffers, _PRECISIONS[self.precision]),
+                      weights, [group.name for group in obj.vertex_groups] if weights is not None else (),
+                      object=obj.name, mesh=mesh.name,
+                      use_relative=bool(mesh.shape_keys.use_relative) if mesh.shape_keys else True)
+
+        self.report({'INFO'}, '%s: exported %d shape keys to %s' % (obj.name, len(kbs), self.filepath))
+        return {'FINISHED'}
+
+
+class _ImportSidecar(bpy.types.Operator, ImportHelper):
+    """
+    Reads the shape keys and vertex weights of a sidecar file onto the active mesh.
+    """
+
+    bl_label = "Import Shape Key Sidecar"
+    bl_idname = "creaturetime.import_sidecar"
+    bl_description = "Reads the shape keys and vertex weights of a sidecar file onto the active mesh."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = '.ctsc'
+    filter_glob: StringProperty(default='*.ctsc', options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        obj = common.get_active()
+        return context.mode == 'OBJECT' and obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        obj = common.get_active()
+        try:
+            data = sidecar.read(self.filepath)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        if data.contents['vertex_count'] != len(obj.data.vertices):
+            self.report({'ERROR'}, '%s: has %d vertices, the sidecar has %d' % (
+                obj.name, len(obj.data.vertices), data.contents['vertex_count']))
+            return {'CANCELLED'}
+
+        self.import_shape_keys(obj, data)
+        if 'weights/vertices' in data.contents['arrays']:
+            self.import_weights(obj, data)
+
+        self.report({'INFO'}, '%s: imported %d shape keys from %s' % (
+            obj.name, len(data.contents['shape_keys']), self.filepath))
+        return {'FINISHED'}
+
+    @staticmethod
+    def import_shape_keys(obj, data):
+        keys = data.contents['shape_keys']
+        if not keys:
+            return
+
+        coords = sidecar.shape_key_coords(data)
+        for key in keys:
+            kb = obj.data.shape_keys.key_blocks.get(key['name']) if obj.data.shape_keys else None
+            if kb is None:
+                kb = obj.shape_key_add(name=key['name'], from_mix=False)
+            adapters.set_coords(kb.data, coords[key['name']])
+
+        kbs = obj.data.shape_keys.key_blocks
+        obj.data.shape_keys.use_relative = data.contents.get('use_relative', True)
+        for key in keys:
+            if key['relative'] is not None:
+                kbs[key['name']].relative_key = kbs[key['relative']]
+
+        # Keep the mesh matching its Basis key
+        adapters.set_coords(obj.data.vertices, adapters.get_coords(kbs[0].data))
+        obj.data.update()
+
+    @staticmethod
+    def import_weights(obj, data):
+        vertex_groups = obj.vertex_groups
+        vertex_count = len(obj.data.vertices)
+        targets = []
+        for name in data.contents['vertex_groups']:
+            group = vertex_groups.get(name)
+            if group is None:
+                group = vertex_groups.new(name=name)
+            else:
+                group.remove(list(range(vertex_count)))
+            targets.append(group.index)
+
+        targets = np.array(targets, dtype=np.int64)
+        groups = np.asarray(data.array('weights/groups'), dtype=np.int64)
+        matrix = core_vertex_groups.WeightMatrix(vertex_count, len(vertex_groups),
+                                                 data.array('weights/vertices'), targets[groups],
+                                                 data.array('weights/weights'))
+        adapters.set_weight_matrix(obj, matrix)
+
+
+def export_operators(self, _):
+    self.layout.operator(_ExportSidecar.bl_idname, text='CreatureTime Shape Key Sidecar (.ctsc)')
+
+
+def import_operators(self, _):
+    self.layout.operator(_ImportSidecar.bl_idname, text='CreatureTime Shape Key Sidecar (.ctsc)')
+
+
+def register():
+    bpy.utils.register_class(_ExportSidecar)
+    bpy.utils.register_class(_ImportSidecar)
+
+    bpy.types.TOPBAR_MT_file_export.append(export_operators)
+    bpy.types.TOPBAR_MT_file_import.append(import_operators)
+
+
+def unregister():
+    bpy.types.TOPBAR_MT_file_import.remove(import_operators)
+    bpy.types.TOPBAR_MT_file_export.remove(export_operators)
+
+    bpy.utils.unregister_class(_ImportSidecar)
+    bpy.utils.unregister_class(_ExportSidecar)
@@ -3,11 +3,13 @@
 import bpy
 
 # CreatureTime imports
+from . import common
+from .. import adapters
 from .. import resources
 
 class _RemoveUnusedVertexGroups(bpy.types.Operator):
     """
-    Delete Vertex Groups with no assigned weight of active object
+    Delete Vertex Groups with no assigned weight of selected objects
     Credit goes to CoDEmanX.
     """
 
@@ -16,20 +18,23 @@ class _RemoveUnusedVertexGroups(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
     bl_region_type = 'UI'
 
+    @classmethod
+    def poll(cls, context):
+        return bool(common.get_meshes(context, lambda obj: obj.vertex_groups))
+
     def execute(self, context):
-        ob = context.object
-        ob.update_from_editmode()
+        for ob in common.get_meshes(context, lambda obj: obj.vertex_groups):
+            ob.update_from_editmode()
 
-        used_vertex_groups = {i: False for i, k in enumerate(ob.vertex_groups)}
+            used_vertex_groups = adapters.get_weight_matrix(ob).used_groups(0.0)
 
-        for v in ob.data.vertices:
-            for g in v.groups:
-                if g.weight > 0.0:
-                    used_vertex_groups[g.group] = True
+            removed = 0
+            for i in reversed(range(len(used_vertex_groups))):
+                if not used_vertex_groups[i]:
+                    ob.vertex_groups.remove(ob.vertex_groups[i])
+                    removed += 1
 
-        for i, used in sorted(used_vertex_groups.items(), reverse=True):
-            if not used:
-                ob.vertex_groups.remove(ob.vertex_groups[i])
+            self.report({'INFO'}, '%s: removed %d vertex groups' % (ob.name, removed))
 
         return {'FINISHED'}
 
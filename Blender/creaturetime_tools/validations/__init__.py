@@ -1,7 +1,10 @@
 import bpy
+import numpy as np
 
 from bpy.props import (IntProperty,
                        BoolProperty,
+                       EnumProperty,
+                       FloatProperty,
                        StringProperty,
                        CollectionProperty,
                        PointerProperty)
@@ -13,7 +16,13 @@ from bpy.types import (Operator,
 
 from bpy.app.handlers import persistent
 
+from .. import adapters
 from .. import resources
+from ..core import budget
+from ..core import meshes
+from ..core import names
+from ..core import shape_keys as core_shape_keys
+from ..operators import shape_keys as shape_key_operators
 
 
 # -------------------------------------------------------------------
@@ -76,15 +85,163 @@ class ObjectNamesValidation(Validation):
         return True
 
     def validate(self, context, scene):
+        # Data shared by several objects only needs to match one of them
+        users = {}
         for obj in bpy.data.objects:
             if not isinstance(obj.data, (bpy.types.Mesh, bpy.types.Armature)):
                 continue
+            users.setdefault(obj.data, []).append(obj)
 
-            mesh = obj.data
-            if obj.name != mesh.name:
-                self.error(
-                    'Name (%s) did not match object name (%s)' % (mesh.name, obj.name),
-                    ObjectNamesValidation.repair_names, (mesh, obj))
+        for mesh, objs in users.items():
+            if any(obj.name == mesh.name for obj in objs):
+                continue
+
+            obj = objs[0]
+            self.error(
+                'Name (%s) did not match object name (%s)' % (mesh.name, obj.name),
+                ObjectNamesValidation.repair_names, (mesh, obj))
+
+
+class DuplicateMeshesValidation(Validation):
+    NAME = 'Duplicate Meshes'
+
+    # Values closer than this are treated as equal for near-duplicates
+    PRECISION = 1e-4
+
+    @staticmethod
+    def repair_instances(context):
+        mesh, owner, objs = context
+        # Replaced meshes are left without users rather than removed, other errors may still hold them
+        for obj in objs:
+            obj.data = mesh
+
+        # Keep the shared data named after its owner
+        if mesh.name != owner.name:
+            ObjectNamesValidation.repair_names((mesh, owner))
+        return True
+
+    @staticmethod
+    def signature(mesh, obj):
+        """
+        Cheap to compute key, only meshes with equal signatures are compared.
+        """
+        key_blocks = mesh.shape_keys.key_blocks if mesh.shape_keys else ()
+        return (len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons),
+                tuple(kb.name for kb in key_blocks),
+                tuple(kb.relative_key.name for kb in key_blocks),
+                tuple(material.name if material else '' for material in mesh.materials),
+                tuple(layer.name for layer in mesh.uv_layers),
+                tuple((attribute.name, attribute.domain, attribute.data_type)
+                      for attribute in DuplicateMeshesValidation.attributes(mesh)),
+                tuple(group.name for group in obj.vertex_groups))
+
+    @staticmethod
+    def attributes(mesh):
+        """
+        Returns the generic attributes that are not hashed separately, e.g. colors and custom normals.
+
+        Internal attributes (selection, hiding, topology) start with a dot and are skipped.
+        """
+        hashed = {'position', 'material_index'} | {layer.name for layer in mesh.uv_layers}
+        return [attribute for attribute in mesh.attributes
+                if not attribute.name.startswith('.') and attribute.name not in hashed]
+
+    @staticmethod
+    def arrays(mesh, obj):
+        """
+        Returns the arrays of the mesh data, including vertex weights, material
+        assignment and generic attributes, so only meshes that can share data
+        without changing their objects match.
+        """
+        co = adapters.get_array(mesh.vertices, 'co', np.float32, 3)
+        arrays = [co,
+                  adapters.get_array(mesh.edges, 'vertices', np.int32, 2),
+                  adapters.get_array(mesh.loops, 'vertex_index', np.int32),
+                  adapters.get_array(mesh.polygons, 'loop_total', np.int32),
+                  adapters.get_array(mesh.polygons, 'material_index', np.int32)]
+        if mesh.shape_keys:
+            for kb in mesh.shape_keys.key_blocks:
+                arrays.append(adapters.get_coords(kb.data))
+        for layer in mesh.uv_layers:
+            arrays.append(adapters.get_array(layer.data, 'uv', np.float32, 2))
+        for attribute in DuplicateMeshesValidation.attributes(mesh):
+            values = adapters.get_attribute(attribute)
+            if values is not None:
+                arrays.append(values)
+
+        weights = adapters.get_weight_matrix(obj)
+        arrays.extend((weights.vertices, weights.groups, weights.weights))
+
+        return arrays
+
+    def validate(self, context, scene):
+        users = {}
+        for obj in bpy.data.objects:
+            if isinstance(obj.data, bpy.types.Mesh):
+                users.setdefault(obj.data, []).append(obj)
+
+        buckets = {}
+        for mesh in sorted(users, key=lambda m: m.name):
+            buckets.setdefault(self.signature(mesh, users[mesh][0]), []).append(mesh)
+
+        for candidates in buckets.values():
+            if len(candidates) < 2:
+                continue
+
+            arrays = [self.arrays(mesh, users[mesh][0]) for mesh in candidates]
+
+            duplicates = set()
+            for indices in meshes.group_duplicates([meshes.fingerprint(values) for values in arrays]):
+                mesh = candidates[indices[0]]
+                for index in indices[1:]:
+                    duplicate = candidates[index]
+                    duplicates.add(index)
+                    self.error(
+                        'Mesh (%s) is a duplicate of (%s)' % (duplicate.name, mesh.name),
+                        DuplicateMeshesValidation.repair_instances, (mesh, users[mesh][0], users[duplicate]))
+
+            remaining = [index for index in range(len(candidates)) if index not in duplicates]
+            for indices in meshes.group_near_duplicates([arrays[index] for index in remaining], self.PRECISION):
+                mesh = candidates[remaining[indices[0]]]
+                for index in indices[1:]:
+                    duplicate = candidates[remaining[index]]
+                    self.warning(
+                        'Mesh (%s) is nearly a duplicate of (%s)' % (duplicate.name, mesh.name),
+                        DuplicateMeshesValidation.repair_instances, (mesh, users[mesh][0], users[duplicate]))
+
+
+class DuplicateShapeKeysValidation(Validation):
+    NAME = 'Duplicate Shape Keys'
+
+    @staticmethod
+    def repair_duplicates(context):
+        obj, kept, duplicates = context
+        removed, skipped = shape_key_operators.merge_shape_keys(obj, kept, duplicates)
+        if removed:
+            shape_key_operators.write_remap(obj.data, removed)
+
+        # Skipped keys cannot be merged by repeating the repair, so only warn about them
+        if skipped and not bpy.app.background:
+            message = shape_key_operators.skipped_message(obj, skipped)
+            bpy.context.window_manager.popup_menu(lambda menu, _: menu.layout.label(text=message),
+                                                  title='Some duplicate shape keys were not merged', icon='ERROR')
+        return True
+
+    def validate(self, context, scene):
+        # Buffers are shared by all meshes, and shared meshes are only read once
+        buffers = adapters.Buffers()
+        visited = set()
+        for obj in bpy.data.objects:
+            if obj.type != 'MESH' or obj.data in visited:
+                continue
+            visited.add(obj.data)
+            if not (obj.data.shape_keys and obj.data.shape_keys.use_relative):
+                continue
+
+            for kept, duplicates in shape_key_operators.find_duplicate_shape_keys(obj, buffers):
+                self.warning(
+                    'Shape keys (%s) of %s duplicate (%s)' % (', '.join(name for name, _ in duplicates), obj.name, kept),
+                    DuplicateShapeKeysValidation.repair_duplicates, (obj, kept, duplicates))
 
 
 class BoneNamesValidation(Validation):
@@ -92,46 +249,113 @@ class BoneNamesValidation(Validation):
 
     @staticmethod
     def repair_names(context):
-        bone = context[0]
-        name = bone.name
-        if ':' in name:
-            name = name[name.rfind(':') + 1:]
-        if 'Left' in name:
-            name = name.replace('Left', '')
-            name += '_L'
-        if 'Right' in name:
-            name = name.replace('Right', '')
-            name += '_R'
-        if ' ' in name:
-            name = name.replace(' ', '')
-        bone.name = name
+        bone, convention = context
+        bone.name = names.repair_name(bone.name, convention)
 
         return True
 
     def validate(self, context, scene):
+        convention = bpy.context.window_manager.validator_settings.bone_naming_convention
+
         for obj in bpy.data.objects:
             if not isinstance(obj.data, bpy.types.Armature):
                 continue
 
             error_msg = 'Bone name (%s) needs to have correct naming convention'
 
+            # Classify all bones of the armature in one pass
             armature = obj.data
-            for bone in armature.bones:
-                if ':' in bone.name:
-                    self.error(error_msg % bone.name, BoneNamesValidation.repair_names, bone)
-                    continue
+            bones = armature.bones
+            for index in np.flatnonzero(names.classify(bones.keys(), convention)):
+                bone = bones[int(index)]
+                self.error(error_msg % bone.name, BoneNamesValidation.repair_names, (bone, convention))
 
-                if ' ' in bone.name:
-                    self.error(error_msg % bone.name, BoneNamesValidation.repair_names, bone)
-                    continue
 
-                if 'Left' in bone.name:
-                    self.error(error_msg % bone.name, BoneNamesValidation.repair_names, bone)
-                    continue
+class PerformanceBudgetValidation(Validation):
+    NAME = 'Performance Budget'
 
-                if 'Right' in bone.name:
-                    self.error(error_msg % bone.name, BoneNamesValidation.repair_names, bone)
-                    continue
+    def __init__(self):
+        super().__init__()
+        # (object name, costs) of the last run, drawn in the validator panel
+        self.costs = []
+
+    def reset(self):
+        super().reset()
+        self.costs = []
+
+    @staticmethod
+    def limits(settings):
+        if settings.performance_rank != 'CUSTOM':
+            return budget.RANKS[settings.performance_rank]
+        return {'triangles': settings.max_triangles,
+                'vertices': settings.max_vertices,
+                'blendshape_bytes': int(settings.max_blendshape_megabytes * (1 << 20)),
+                'bones': settings.max_bones,
+                'influences': settings.max_influences,
+                'materials': settings.max_materials}
+
+    @staticmethod
+    def format_cost(metric, value):
+        if metric == 'blendshape_bytes':
+            return '%.2f MB' % (value / float(1 << 20))
+        return '{:,}'.format(value)
+
+    @staticmethod
+    def object_costs(obj, buffers):
+        """
+        Returns the costs of a mesh object and the names of the bones skinning it.
+        """
+        mesh = obj.data
+
+        # Blend shape memory only counts the vertices each key moves
+        affected_counts = [np.count_nonzero(core_shape_keys.affected_vertices(locs, rel_locs, 0.0))
+                           for _, locs, rel_locs in adapters.iter_key_deltas(obj, buffers)]
+
+        # Only vertex groups of deforming bones are skinned
+        bone_names = set()
+        for modifier in obj.modifiers:
+            if modifier.type == 'ARMATURE' and modifier.object:
+                bone_names.update(modifier.object.data.bones.keys())
+
+        matrix = adapters.get_weight_matrix(obj)
+        used = np.flatnonzero(matrix.used_groups(0.0))
+        bones = {obj.vertex_groups[i].name for i in used} & bone_names
+        skinned = [group.name in bone_names for group in obj.vertex_groups]
+
+        costs = {
+            'triangles': budget.triangle_count(adapters.get_array(mesh.polygons, 'loop_total', np.int32)),
+            'vertices': len(mesh.vertices),
+            'blendshape_bytes': budget.blendshape_bytes(affected_counts),
+            'bones': len(bones),
+            'influences': budget.max_influences(matrix, skinned),
+            'materials': len(obj.material_slots),
+        }
+        return costs, bones
+
+    def validate(self, context, scene):
+        settings = bpy.context.window_manager.validator_settings
+        limits = self.limits(settings)
+
+        buffers = adapters.Buffers()
+        objs = []
+        bones = set()
+        for obj in bpy.data.objects:
+            if not isinstance(obj.data, bpy.types.Mesh):
+                continue
+            costs, obj_bones = self.object_costs(obj, buffers)
+            self.costs.append((obj.name, costs))
+            objs.append(obj.name)
+            bones |= obj_bones
+
+        costs = [cost for _, cost in self.costs]
+        totals = budget.totals(costs)
+        totals['bones'] = len(bones)
+
+        labels = dict(budget.METRICS)
+        for metric, value, limit, largest in budget.over_budget(totals, costs, limits):
+            self.error('%s (%s) exceeds the budget (%s), largest is %s (%s)' % (
+                labels[metric], self.format_cost(metric, value), self.format_cost(metric, limit),
+                objs[largest], self.format_cost(metric, costs[largest][metric])))
 
 
 # -------------------------------------------------------------------
@@ -139,6 +363,22 @@ class BoneNamesValidation(Validation):
 # -------------------------------------------------------------------
 
 
+def clear_errors(wm):
+    wm.errors.clear()
+    wm.repairable_error_count = 0
+
+
+def remove_error(wm, index):
+    if wm.errors[index].repairable:
+        wm.repairable_error_count -= 1
+    wm.errors.remove(index)
+
+
+def update_enabled_validations(self, context):
+    wm = context.window_manager
+    wm.enabled_validation_count = sum(item.validate for item in wm.validations)
+
+
 def validate_item(context, wm, item, validation):
     validation.reset()
     validation.validate(context, wm)
@@ -153,6 +393,9 @@ def validate_item(context, wm, item, validation):
             error_item.icon_value = error_icon_id if error_type else warning_icon_id
             error_item.validation_id = item.id
             error_item.error_id = error_id
+            error_item.repairable = bool(repair)
+            if repair:
+                wm.repairable_error_count += 1
 
 
 class CREATURETIME_OT_ValidateAllActions(Operator):
@@ -165,17 +408,13 @@ class CREATURETIME_OT_ValidateAllActions(Operator):
 
     @classmethod
     def poll(cls, context):
-        wm = bpy.context.window_manager
-        for item in wm.validations:
-            if item.validate:
-                return True
-        return False
+        return bpy.context.window_manager.enabled_validation_count > 0
 
     def invoke(self, context, event):
         wm = bpy.context.window_manager
 
         # Clear out previous errors
-        wm.errors.clear()
+        clear_errors(wm)
 
         for idx, item in enumerate(wm.validations):
             if not item.validate:
@@ -212,7 +451,7 @@ class CREATURETIME_OT_ValidateActions(Operator):
             pass
         else:
             # Clear out previous errors
-            wm.errors.clear()
+            clear_errors(wm)
 
             # Run Validation
             validation = validations[item.id]
@@ -231,12 +470,7 @@ class CREATURETIME_OT_RepairAllActions(Operator):
 
     @classmethod
     def poll(cls, context):
-        wm = bpy.context.window_manager
-        for item in wm.errors:
-            validation = validations[item.validation_id]
-            if validation.has_repair(item.error_id):
-                return True
-        return False
+        return bpy.context.window_manager.repairable_error_count > 0
 
     def invoke(self, context, event):
         wm = bpy.context.window_manager
@@ -250,7 +484,7 @@ class CREATURETIME_OT_RepairAllActions(Operator):
             index += 1
 
         for index in to_remove:
-            wm.errors.remove(index)
+            remove_error(wm, index)
 
         return {"FINISHED"}
 
@@ -271,8 +505,7 @@ class CREATURETIME_OT_RepairActions(Operator):
         except IndexError:
             return False
         else:
-            validation = validations[item.validation_id]
-            return validation.has_repair(item.error_id)
+            return item.repairable
 
     def invoke(self, context, event):
         wm = bpy.context.window_manager
@@ -284,7 +517,7 @@ class CREATURETIME_OT_RepairActions(Operator):
             validation = validations[item.validation_id]
             if validation.has_repair(item.error_id):
                 if validation.repair(item.error_id):
-                    wm.errors.remove(wm.error_index)
+                    remove_error(wm, wm.error_index)
                 else:
                     raise Exception('Failed to repair - %s' % item.name)
 
@@ -344,6 +577,8 @@ class VIEW3D_PT_Validator(Panel):
                      text="",
                      icon_value=resources.get('validate_x16').icon_id)
 
+        layout.prop(wm.validator_settings, 'bone_naming_convention')
+
         layout.label(text='Errors', icon_value=resources.get('repair_x16').icon_id)
         row = layout.row()
         row.template_list(CREATURETIME_UL_Errors.__name__,
@@ -361,6 +596,43 @@ class VIEW3D_PT_Validator(Panel):
                      icon_value=resources.get('repair_x16').icon_id)
 
 
+class VIEW3D_PT_PerformanceBudget(Panel):
+    """Performance budget cost breakdown panel."""
+
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_label = 'Performance Budget'
+    bl_category = 'CreatureTime'
+    bl_parent_id = 'VIEW3D_PT_Validator'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        settings = bpy.context.window_manager.validator_settings
+
+        layout.prop(settings, 'performance_rank')
+        if settings.performance_rank == 'CUSTOM':
+            col = layout.column(align=True)
+            col.prop(settings, 'max_triangles')
+            col.prop(settings, 'max_vertices')
+            col.prop(settings, 'max_blendshape_megabytes')
+            col.prop(settings, 'max_bones')
+            col.prop(settings, 'max_influences')
+            col.prop(settings, 'max_materials')
+
+        validation = next(v for v in validations if isinstance(v, PerformanceBudgetValidation))
+        limits = validation.limits(settings)
+        for name, costs in validation.costs:
+            box = layout.box()
+            box.label(text=name, icon='MESH_DATA')
+            col = box.column(align=True)
+            for metric, label in budget.METRICS:
+                row = col.row()
+                row.alert = costs[metric] > limits[metric]
+                row.label(text=label)
+                row.label(text=validation.format_cost(metric, costs[metric]))
+
+
 # -------------------------------------------------------------------
 #   Collection
 # -------------------------------------------------------------------
@@ -370,7 +642,7 @@ class CREATURETIME_Validation(PropertyGroup):
 
     # name: StringProperty() -> Instantiated by default
     id: IntProperty(default=-1)
-    validate: BoolProperty()
+    validate: BoolProperty(update=update_enabled_validations)
 
 
 class CREATURETIME_Error(PropertyGroup):
@@ -380,6 +652,33 @@ class CREATURETIME_Error(PropertyGroup):
     validation_id: IntProperty(default=-1)
     error_id: IntProperty(default=-1)
     icon_value: IntProperty(default=-1)
+    repairable: BoolProperty()
+
+
+class CREATURETIME_ValidatorSettings(PropertyGroup):
+    """Validator settings."""
+
+    bone_naming_convention: EnumProperty(
+        name='Bone Naming',
+        description='Naming convention bone names are validated and repaired against',
+        items=[(key, convention.label, '') for key, convention in names.CONVENTIONS.items()],
+        default=names.DEFAULT_CONVENTION)
+
+    performance_rank: EnumProperty(
+        name='Rank',
+        description='Performance rank to validate against',
+        items=[('EXCELLENT', 'Excellent', ''),
+               ('GOOD', 'Good', ''),
+               ('MEDIUM', 'Medium', ''),
+               ('POOR', 'Poor', ''),
+               ('CUSTOM', 'Custom', 'Use the limits below')],
+        default='GOOD')
+    max_triangles: IntProperty(name='Triangles', min=0, default=budget.RANKS['GOOD']['triangles'])
+    max_vertices: IntProperty(name='Vertices', min=0, default=budget.RANKS['GOOD']['vertices'])
+    max_blendshape_megabytes: FloatProperty(name='Blend Shape Memory (MB)', min=0.0, default=8.0)
+    max_bones: IntProperty(name='Skinned Bones', min=0, default=budget.RANKS['GOOD']['bones'])
+    max_influences: IntProperty(name='Influences Per Vertex', min=0, default=budget.RANKS['GOOD']['influences'])
+    max_materials: IntProperty(name='Material Slots', min=0, default=budget.RANKS['GOOD']['materials'])
 
 
 # -------------------------------------------------------------------
@@ -396,27 +695,33 @@ classes = (
     CREATURETIME_Validation,
     CREATURETIME_UL_Errors,
     CREATURETIME_Error,
+    CREATURETIME_ValidatorSettings,
     VIEW3D_PT_Validator,
+    VIEW3D_PT_PerformanceBudget,
 )
 
 # Store all validations
 # TODO: Make this discoverable.
 validations = (
     ObjectNamesValidation(),
-    BoneNamesValidation()
+    BoneNamesValidation(),
+    DuplicateMeshesValidation(),
+    DuplicateShapeKeysValidation(),
+    PerformanceBudgetValidation()
 )
 
 
 @persistent
 def load_validations(*args, **kwargs):
     wm = bpy.context.window_manager
-    wm.errors.clear()
+    clear_errors(wm)
     wm.validations.clear()
     for idx, validation in enumerate(validations):
         item = wm.validations.add()
         item.name = validation.NAME
         item.id = idx
         item.validate = True
+    wm.enabled_validation_count = len(wm.validations)
 
 
 def register():
@@ -431,6 +736,11 @@ def register():
     wm.errors = CollectionProperty(type=CREATURETIME_Error)
     wm.error_index = IntProperty(name='Active Error Index')
 
+    # Kept up to date as errors and validations change, so poll() stays O(1)
+    wm.repairable_error_count = IntProperty(name='Repairable Errors')
+    wm.enabled_validation_count = IntProperty(name='Enabled Validations')
+    wm.validator_settings = PointerProperty(type=CREATURETIME_ValidatorSettings)
+
     bpy.app.handlers.load_post.append(load_validations)
 
 
@@ -443,6 +753,9 @@ def unregister():
     del wm.validation_index
     del wm.errors
     del wm.error_index
+    del wm.repairable_error_count
+    del wm.enabled_validation_count
+    del wm.validator_settings
 
     from bpy.utils import unregister_class
     for cls in reversed(classes):
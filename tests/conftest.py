@@ -0,0 +1,8 @@
+import os
+import sys
+
+# `creaturetime_tools.core` only needs NumPy, so it is tested without Blender
+BLENDER_PLUGINS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Blender')
+
+if BLENDER_PLUGINS_DIR not in sys.path:
+    sys.path.insert(0, BLENDER_PLUGINS_DIR)
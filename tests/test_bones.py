@@ -0,0 +1,41 @@
+import numpy as np
+
+from creaturetime_tools.core import bones
+
+
+def naive_kept_ancestors(parents, keep):
+    ancestors = []
+    for parent in parents:
+        while parent >= 0 and not keep[parent]:
+            parent = parents[parent]
+        ancestors.append(parent)
+    return ancestors
+
+
+def random_tree(count, seed):
+    rng = np.random.default_rng(seed)
+    parents = np.full(count, -1, dtype=np.int32)
+    for index in range(1, count):
+        parents[index] = rng.integers(-1, index) if rng.random() < 0.9 else -1
+    return parents, rng.random(count) < 0.5
+
+
+def test_nearest_kept_ancestors_matches_naive():
+    for seed in range(50):
+        parents, keep = random_tree(300, seed)
+        assert bones.nearest_kept_ancestors(parents, keep).tolist() == naive_kept_ancestors(parents, keep)
+
+
+def test_nearest_kept_ancestors_long_chain():
+    parents = np.arange(-1, 999, dtype=np.int32)
+    keep = np.zeros(1000, dtype=bool)
+    keep[0] = True
+    ancestors = bones.nearest_kept_ancestors(parents, keep)
+    assert ancestors[0] == -1
+    assert (ancestors[1:] == 0).all()
+
+
+def test_parent_indices_and_child_counts():
+    parents = bones.parent_indices(['Hips', 'Spine', 'Leg_L', 'Leg_R'], [None, 'Hips', 'Hips', 'Missing'])
+    assert parents.tolist() == [-1, 0, 0, -1]
+    assert bones.child_counts(parents).tolist() == [2, 0, 0, 0]
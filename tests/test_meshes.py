@@ -0,0 +1,27 @@
+import numpy as np
+
+from creaturetime_tools.core import meshes
+
+
+def test_group_duplicates():
+    arrays = [[np.arange(6.0)], [np.arange(6.0) + 1], [np.arange(6.0)]]
+    fingerprints = [meshes.fingerprint(values) for values in arrays]
+    assert meshes.group_duplicates(fingerprints) == [[0, 2]]
+
+
+def test_group_near_duplicates_within_precision():
+    rng = np.random.default_rng(0)
+    co = rng.random(3000).astype(np.float32)
+    faces = np.arange(3000, dtype=np.int32)
+    arrays = [[co, faces] for _ in range(20)]
+    # Noise far below the precision still crosses any grid of that size
+    arrays = [[values[0] + rng.uniform(-2e-5, 2e-5, co.shape).astype(np.float32), values[1]] for values in arrays]
+    arrays.append([co + 1e-3, faces])
+    arrays.append([co, faces[::-1].copy()])
+
+    assert meshes.group_near_duplicates(arrays, 1e-4) == [list(range(20))]
+
+
+def test_group_near_duplicates_requires_equal_shapes():
+    arrays = [[np.zeros(3), np.zeros(2)], [np.zeros(3), np.zeros(4)]]
+    assert meshes.group_near_duplicates(arrays, 1e-4) == []
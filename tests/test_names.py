@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from creaturetime_tools.core import names
+
+
+def old_needs_repair(name):
+    return ':' in name or ' ' in name or 'Left' in name or 'Right' in name
+
+
+def old_repair_name(name):
+    """
+    The bone name repair the validator used before naming conventions.
+    """
+    if ':' in name:
+        name = name[name.rfind(':') + 1:]
+    if 'Left' in name:
+        name = name.replace('Left', '')
+        name += '_L'
+    if 'Right' in name:
+        name = name.replace('Right', '')
+        name += '_R'
+    if ' ' in name:
+        name = name.replace(' ', '')
+    return name
+
+
+def random_names(count, seed=0):
+    rng = random.Random(seed)
+    parts = ['Left', 'Right', ' ', ':', 'mixamorig:', 'Arm', 'Leg', '_L', '.R', 'Spine', 'Le', 'ft', '']
+    return [''.join(rng.choice(parts) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+
+def test_creaturetime_matches_old_repair():
+    bone_names = random_names(5000)
+    for name in bone_names:
+        assert names.needs_repair(name) == old_needs_repair(name), name
+        assert names.repair_name(name) == old_repair_name(name), name
+
+
+def test_classify_matches_needs_repair():
+    bone_names = random_names(2000, seed=1)
+    for convention in names.CONVENTIONS:
+        flagged = names.classify(bone_names, convention)
+        assert flagged.tolist() == [names.needs_repair(name, convention) for name in bone_names]
+
+
+def test_classify_empty():
+    assert len(names.classify([])) == 0
+
+
+@pytest.mark.parametrize('convention, name, expected', [
+    ('CREATURETIME', 'mixamorig:Left Arm', 'Arm_L'),
+    ('UNITY', 'Arm_L', 'LeftArm'),
+    ('UNITY', 'Head_Ball', 'Head_Ball'),
+    ('MIXAMO', 'Arm.R', 'mixamorig:RightArm'),
+    ('MIXAMO', 'mixamorig:Spine', 'mixamorig:Spine'),
+    ('MIXAMO', 'mixamorig:Arm_L', 'mixamorig:LeftArm'),
+    ('MIXAMO', 'Rig:Arm_L', 'mixamorig:LeftArm'),
+    ('UNITY', 'Rig:Leg.R', 'RightLeg'),
+])
+def test_repair_name(convention, name, expected):
+    assert names.repair_name(name, convention) == expected
+
+
+def test_repair_all_only_rewrites_flagged():
+    bone_names = ['Spine', 'Left Arm', 'Head']
+    assert names.CONVENTIONS['CREATURETIME'].repair_all(bone_names) == ['Spine', 'Arm_L', 'Head']
+
+
+@pytest.mark.parametrize('convention, name', [
+    ('MIXAMO', 'mixamorig:Arm_L'),
+    ('MIXAMO', 'Arm Right'),
+    ('UNITY', 'Spine_L'),
+    ('UNITY', 'Neck:Arm.R'),
+])
+def test_repaired_names_pass_validation(convention, name):
+    repaired = names.repair_name(name, convention)
+    assert not names.needs_repair(repaired, convention), repaired
+
+
+@pytest.mark.parametrize('convention', ['UNITY', 'MIXAMO'])
+def test_side_alone_is_not_flagged(convention):
+    assert not names.needs_repair('mixamorig:Left' if convention == 'MIXAMO' else 'Left', convention)
@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+
+from creaturetime_tools.core import shape_keys
+
+
+def move_to_top(names, name, relative):
+    """
+    Simulates Blender's `object.shape_key_move(type='TOP')`.
+    """
+    index = names.index(name)
+    new_index = 0 if index <= 1 or not relative else 1
+    names.insert(new_index, names.pop(index))
+
+
+@pytest.mark.parametrize('relative', [True, False])
+def test_sort_moves(relative):
+    rng = np.random.default_rng(0)
+    pool = list(shape_keys.DEFAULT_ORDER) + ['Key.%03d' % index for index in range(20)]
+    for _ in range(500):
+        names = list(rng.choice(pool, size=rng.integers(1, len(pool)), replace=False))
+        order = shape_keys.shape_key_order()
+
+        moves = shape_keys.sort_moves(names, order, relative=relative)
+        result = list(names)
+        for name in moves:
+            move_to_top(result, name, relative)
+
+        # Every key moves at most once, except the reference key which may need two moves
+        assert sorted(result) == sorted(names)
+        assert len([name for name in moves if name != 'Basis']) == len(set(moves) - {'Basis'})
+        assert moves.count('Basis') <= 2
+        if relative and 'Basis' in names:
+            assert result[0] == 'Basis'
+            targets = [name for name in order if name in names and name != 'Basis']
+            assert result[1:1 + len(targets)] == targets
+        elif not relative:
+            targets = [name for name in order if name in names]
+            assert result[:len(targets)] == targets
+
+
+def test_sort_moves_restores_any_order():
+    rng = np.random.default_rng(1)
+    names = ['Basis'] + ['Key.%03d' % index for index in range(30)]
+    for _ in range(200):
+        original = [names[0]] + list(rng.permutation(names[1:]))
+        shuffled = [names[0]] + list(rng.permutation(names[1:]))
+
+        result = list(shuffled)
+        for name in shape_keys.sort_moves(shuffled, original):
+            move_to_top(result, name, True)
+        assert result == original
+
+
+def test_is_unused_and_affected_vertices():
+    rel_locs = np.zeros(12, dtype=np.float32)
+    locs = rel_locs.copy()
+    locs[4] = 0.0005
+    assert shape_keys.is_unused(locs, rel_locs, 0.001)
+
+    locs[7] = 0.01
+    assert not shape_keys.is_unused(locs, rel_locs, 0.001)
+    assert shape_keys.affected_vertices(locs, rel_locs, 0.001).tolist() == [False, False, True, False]
+
+
+def test_remap_keys():
+    basis = np.arange(9, dtype=np.float32)
+    coords = np.stack([basis, basis + 1.0])
+    target_basis = np.zeros(6, dtype=np.float32)
+
+    remapped = shape_keys.remap_keys(coords, basis, [2, 0], target_basis)
+    assert remapped.shape == (2, 6)
+    assert np.allclose(remapped[0], 0.0)
+    assert np.allclose(remapped[1], 1.0)
+
+
+def make_keys(vertex_count=2000, key_count=50, seed=0):
+    rng = np.random.default_rng(seed)
+    basis = rng.random(3 * vertex_count).astype(np.float32)
+    keys = {}
+    for index in range(key_count):
+        locs = basis.copy()
+        start = 3 * int(rng.integers(0, vertex_count - 100))
+        locs[start:start + 300] += rng.random(300).astype(np.float32) * 0.05
+        keys['Key.%03d' % index] = locs
+    return rng, basis, keys
+
+
+def find_clusters(basis, keys, names=('Basis', '')):
+    finder = shape_keys.DuplicateFinder(0.001)
+    for name, locs in keys.items():
+        finder.add(name, locs, basis, names)
+    return {kept: dict(duplicates) for kept, duplicates in finder.clusters()}
+
+
+def test_duplicate_finder_exact_and_scaled_copies():
+    _, basis, keys = make_keys()
+    keys['Copy'] = keys['Key.001'].copy()
+    keys['Half'] = basis + (keys['Key.002'] - basis) * 0.5
+    keys['Negated'] = basis - (keys['Key.003'] - basis)
+    keys['Zero'] = basis.copy()
+
+    clusters = find_clusters(basis, keys)
+    assert set(clusters) == {'Key.001', 'Key.002'}
+    assert clusters['Key.001'] == pytest.approx({'Copy': 1.0})
+    assert clusters['Key.002'] == pytest.approx({'Half': 0.5}, rel=1e-4)
+
+
+def test_duplicate_finder_keeps_largest_key():
+    _, basis, keys = make_keys(key_count=5)
+    keys['Double'] = basis + (keys['Key.004'] - basis) * 2.0
+
+    clusters = find_clusters(basis, keys)
+    assert clusters == {'Double': pytest.approx({'Key.004': 0.5}, rel=1e-4)}
+
+
+def test_duplicate_finder_noisy_copies():
+    rng, basis, keys = make_keys()
+    for index in range(10):
+        original = keys['Key.%03d' % index]
+        keys['Noisy.%03d' % index] = original + rng.normal(0.0, 1e-6, original.shape).astype(np.float32)
+
+    # Noise can make either key of a pair the larger one, which is kept
+    clusters = find_clusters(basis, keys)
+    pairs = sorted(sorted([kept] + list(duplicates)) for kept, duplicates in clusters.items())
+    assert pairs == [['Key.%03d' % index, 'Noisy.%03d' % index] for index in range(10)]
+
+
+def test_duplicate_finder_requires_matching_names():
+    _, basis, keys = make_keys(key_count=1)
+    finder = shape_keys.DuplicateFinder(0.001)
+    finder.add('A', keys['Key.000'], basis, ('Basis', ''))
+    finder.add('B', keys['Key.000'], basis, ('Basis', 'Mask'))
+    assert finder.clusters() == []
+
+
+def test_duplicate_finder_rigid_translations():
+    rng = np.random.default_rng(2)
+    basis = rng.random(3 * 300).astype(np.float32)
+    keys = {}
+    for index, offset in enumerate(rng.normal(size=(5, 3)) * 0.1):
+        keys['Move.%03d' % index] = basis + np.tile(offset, 300).astype(np.float32)
+    moved = keys['Move.000'] - basis
+    keys['Noisy'] = keys['Move.000'] + rng.normal(scale=1e-6, size=basis.shape).astype(np.float32)
+    keys['Scaled'] = basis + moved * 0.7
+
+    clusters = find_clusters(basis, keys)
+    assert len(clusters) == 1
+    (kept, duplicates), = clusters.items()
+    assert sorted([kept] + list(duplicates)) == ['Move.000', 'Noisy', 'Scaled']
+    assert duplicates['Scaled'] == pytest.approx(0.7, rel=1e-3)
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from creaturetime_tools.core import sidecar
+from creaturetime_tools.core import vertex_groups
+
+
+@pytest.fixture
+def shapes():
+    rng = np.random.default_rng(0)
+    basis = rng.random(3 * 500).astype(np.float32)
+    smile = basis.copy()
+    smile[30:90] += 0.1
+    wide_smile = smile.copy()
+    wide_smile[300:330] -= 0.2
+    return basis, smile, wide_smile
+
+
+def write(path, shapes, dtype=np.float32):
+    basis, smile, wide_smile = shapes
+    keys = [
+        ('Basis', None) + sidecar.sparse_delta(basis, basis, dtype),
+        # Relative keys may come before the key they are relative to
+        ('WideSmile', 'Smile') + sidecar.sparse_delta(wide_smile, smile, dtype),
+        ('Smile', 'Basis') + sidecar.sparse_delta(smile, basis, dtype),
+    ]
+    weights = vertex_groups.WeightMatrix(500, 3, [1, 5, 2, 1], [0, 2, 1, 2], [0.5, 1.0, 0.25, 0.3])
+    sidecar.write(path, basis, iter(keys), weights, ['Hips', 'Spine', 'Head'], dtype=dtype, object='Face')
+    return weights
+
+
+def test_round_trip(tmp_path, shapes):
+    path = str(tmp_path / 'face.ctsc')
+    weights = write(path, shapes)
+    basis, smile, wide_smile = shapes
+
+    data = sidecar.read(path)
+    assert data.contents['object'] == 'Face'
+    assert data.contents['vertex_count'] == 500
+    assert data.contents['vertex_groups'] == ['Hips', 'Spine', 'Head']
+    assert [key['name'] for key in data.contents['shape_keys']] == ['Basis', 'WideSmile', 'Smile']
+
+    coords = sidecar.shape_key_coords(data)
+    assert np.array_equal(coords['Basis'].ravel(), basis)
+    assert np.allclose(coords['Smile'].ravel(), smile)
+    assert np.allclose(coords['WideSmile'].ravel(), wide_smile)
+
+    read_weights = vertex_groups.WeightMatrix(500, 3, data.array('weights/vertices'),
+                                              data.array('weights/groups'), data.array('weights/weights'))
+    assert np.array_equal(read_weights.dense(), weights.dense())
+
+
+def test_arrays_are_aligned_memmaps(tmp_path, shapes):
+    path = str(tmp_path / 'face.ctsc')
+    write(path, shapes)
+
+    data = sidecar.read(path)
+    for name, info in data.contents['arrays'].items():
+        assert info['offset'] % 64 == 0, name
+        array = data.array(name)
+        assert list(array.shape) == info['shape']
+        if array.size:
+            assert isinstance(array, np.memmap)
+
+    # External tools only need the contents to map an array
+    info = data.contents['arrays']['basis']
+    basis = np.memmap(path, dtype=info['dtype'], mode='r', offset=info['offset'], shape=tuple(info['shape']))
+    assert np.array_equal(basis.ravel(), shapes[0])
+
+
+def test_float16_deltas(tmp_path, shapes):
+    path = str(tmp_path / 'face.ctsc')
+    write(path, shapes, np.float16)
+
+    data = sidecar.read(path)
+    smile = next(key for key in data.contents['shape_keys'] if key['name'] == 'Smile')
+    assert data.array(smile['deltas']).dtype == np.float16
+    assert np.allclose(sidecar.shape_key_coords(data)['Smile'].ravel(), shapes[1], atol=1e-3)
+
+
+def test_sparse_delta():
+    rel_locs = np.zeros(12, dtype=np.float32)
+    locs = rel_locs.copy()
+    locs[7] = 0.5
+    indices, deltas = sidecar.sparse_delta(locs, rel_locs)
+    assert indices.tolist() == [2]
+    assert deltas.tolist() == [[0.0, 0.5, 0.0]]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        sidecar.read(str(path))
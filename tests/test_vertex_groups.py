@@ -0,0 +1,56 @@
+import numpy as np
+
+from creaturetime_tools.core import vertex_groups
+
+
+def random_matrix(vertex_count=200, group_count=12, density=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    dense = rng.random((vertex_count, group_count)) * (rng.random((vertex_count, group_count)) < density)
+    vertices, groups = np.nonzero(dense)
+    return vertex_groups.WeightMatrix(vertex_count, group_count, vertices, groups, dense[vertices, groups])
+
+
+def test_used_groups():
+    matrix = vertex_groups.WeightMatrix(3, 4, [0, 1, 2], [0, 2, 2], [0.5, 0.0, 0.1])
+    assert matrix.used_groups().tolist() == [True, False, True, False]
+    assert matrix.used_groups(0.2).tolist() == [True, False, False, False]
+
+
+def test_take_matches_dense():
+    matrix = random_matrix()
+    vertex_map = np.random.default_rng(1).integers(0, matrix.vertex_count, 500)
+
+    taken = matrix.take(vertex_map)
+    assert taken.vertex_count == len(vertex_map)
+    assert np.array_equal(taken.dense(), matrix.dense()[vertex_map])
+
+
+def test_merge_groups_matches_dense():
+    matrix = random_matrix(density=0.5)
+    targets = np.arange(matrix.group_count)
+    targets[[1, 2]] = 0
+    targets[5] = 4
+    targets[7] = -1
+
+    merged, changed = vertex_groups.merge_groups(matrix, targets)
+
+    dense = matrix.dense().astype(np.float64)
+    expected = np.zeros_like(dense)
+    for group, target in enumerate(targets):
+        if target >= 0:
+            expected[:, target] += dense[:, group]
+    assert np.allclose(merged.dense(), np.minimum(expected, 1.0))
+
+    # Only entries that received weights from another group are flagged
+    received = np.zeros_like(dense, dtype=bool)
+    for group, target in enumerate(targets):
+        if target >= 0 and target != group:
+            received[:, target] |= dense[:, group] > 0
+    assert np.array_equal(received[merged.vertices, merged.groups], changed)
+
+
+def test_merge_groups_without_changes():
+    matrix = random_matrix()
+    merged, changed = vertex_groups.merge_groups(matrix, np.arange(matrix.group_count))
+    assert np.allclose(merged.dense(), matrix.dense())
+    assert not changed.any()